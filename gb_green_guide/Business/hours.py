@@ -0,0 +1,168 @@
+# Business/hours.py
+"""
+Opening hours parser for Restaurant.contacts_and_hours.
+
+The list mixes phone numbers, emails and hours in free text, e.g.
+
+    ["+92 300 1234567", "Mon-Sat 9:00 AM - 11:00 PM", "Sun 2pm to 2am", "Open 24/7"]
+
+`parse_opening_hours` pulls out the hour entries as weekly spans
+(day, open_minute, close_minute). day 0 = Monday and close_minute is
+exclusive (1440 = midnight). Spans past midnight are split across two days.
+Entries are read clause by clause (split on commas), and closed days -
+"Friday closed", "24 hours except Friday", "closed on Sunday" - are taken
+out of the week. Entries that are not hours (phone numbers, ...) are ignored.
+"""
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+RESTAURANT_TIME_ZONE = getattr(settings, "RESTAURANT_TIME_ZONE", "Asia/Karachi")
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+_DAY = r"(mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?"
+_TIME = r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?|noon|midnight"
+_DAY_RANGE_RE = re.compile(rf"\b{_DAY}\s*(?:-|–|to)\s*{_DAY}", re.I)
+_DAY_RE = re.compile(rf"\b{_DAY}", re.I)
+_TIME_RANGE_RE = re.compile(rf"(?<![\d+])({_TIME})\s*(?:-|–|—|to|till|until)\s*({_TIME})(?![\d])", re.I)
+_ALL_DAY_RE = re.compile(r"24\s*/\s*7|24\s*hours?|open\s+all\s+day|round the clock", re.I)
+_EVERY_DAY_RE = re.compile(r"\b(daily|every\s*day|all\s+days|7\s+days)\b", re.I)
+_WEEKDAYS_RE = re.compile(r"\bweekdays?\b", re.I)
+_WEEKENDS_RE = re.compile(r"\bweekends?\b", re.I)
+_CLOSED_RE = re.compile(r"\bclosed\b", re.I)
+# "24 hours except Friday", "9am-10pm, closed on Sunday" → baaqi text band din
+_EXCEPT_RE = re.compile(r"\b(?:except(?:\s+on)?|excluding|but|closed\s+on)\b", re.I)
+# "Friday closed", "Sun: closed"
+_DAY_CLOSED_RE = re.compile(rf"\b{_DAY}\s*[:\-–]?\s*closed\b", re.I)
+_CLAUSE_SPLIT_RE = re.compile(r"[,;\n]")
+
+
+def _day_index(token):
+    return [name[:3] for name in DAY_NAMES].index(token.lower()[:3])
+
+
+def _minute(text):
+    """'9:30 pm' → 1290; None when it doesn't look like a clock time."""
+    text = text.strip().lower()
+    if text == "noon":
+        return 12 * 60, True
+    if text == "midnight":
+        return 0, True
+    match = re.fullmatch(r"(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?", text)
+    if not match:
+        return None, False
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").replace(".", "")
+    if minute >= 60:
+        return None, False
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None, False
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif hour > 24:
+        return None, False
+    # "clock-like" = am/pm or hh:mm - bare "9-5" jaisi cheezein phone numbers bhi ho sakti hain
+    return (hour * 60 + minute) % MINUTES_PER_DAY, bool(meridiem or match.group(2))
+
+
+def _days(text):
+    match = _DAY_RANGE_RE.search(text)
+    if match:
+        start, end = _day_index(match.group(1)), _day_index(match.group(2))
+        return [(start + offset) % 7 for offset in range((end - start) % 7 + 1)]
+    if _EVERY_DAY_RE.search(text):
+        return list(range(7))
+    if _WEEKDAYS_RE.search(text):
+        return list(range(5))
+    if _WEEKENDS_RE.search(text):
+        return [5, 6]
+    days = sorted({_day_index(match.group(1)) for match in _DAY_RE.finditer(text)})
+    return days or None
+
+
+def _spans(day, open_minute, close_minute):
+    if close_minute > open_minute:
+        return [(day, open_minute, close_minute)]
+    if close_minute == open_minute:
+        return [(day, 0, MINUTES_PER_DAY)]
+    # overnight: 6pm-2am → aaj 18:00-24:00 + agla din 00:00-02:00
+    spans = [(day, open_minute, MINUTES_PER_DAY)]
+    if close_minute:
+        spans.append(((day + 1) % 7, 0, close_minute))
+    return spans
+
+
+def _clauses(text):
+    """
+    'Mon-Sun: 8am-10pm, Friday closed' → ['Mon-Sun: 8am-10pm', 'Friday closed'].
+    Day-only pieces join the next clause, so 'Mon, Wed, Fri 9am-5pm' stays one clause.
+    """
+    clauses, pending = [], ""
+    for piece in _CLAUSE_SPLIT_RE.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        clause = f"{pending} {piece}".strip()
+        has_hours = _ALL_DAY_RE.search(clause) or _TIME_RANGE_RE.search(clause)
+        if _days(clause) and not has_hours and not _CLOSED_RE.search(clause) and not _EXCEPT_RE.search(clause):
+            pending = clause
+            continue
+        clauses.append(clause)
+        pending = ""
+    if pending:
+        clauses.append(pending)
+    return clauses
+
+
+def _parse_clause(text):
+    """One clause → (spans as (source_day, day, open, close), closed days)."""
+    head, tail = (_EXCEPT_RE.split(text, maxsplit=1) + [""])[:2]
+    excluded = set(_days(tail) or [])
+    closed = {_day_index(match.group(1)) for match in _DAY_CLOSED_RE.finditer(text)}
+    days = [day for day in (_days(head) or range(7)) if day not in excluded | closed]
+
+    spans = set()
+    if _ALL_DAY_RE.search(head):
+        spans.update((day, day, 0, MINUTES_PER_DAY) for day in days)
+    else:
+        for match in _TIME_RANGE_RE.finditer(head):
+            (open_minute, open_clock), (close_minute, close_clock) = _minute(match.group(1)), _minute(match.group(5))
+            if open_minute is None or close_minute is None or not (open_clock or close_clock):
+                continue
+            for day in days:
+                spans.update((day, *span) for span in _spans(day, open_minute, close_minute))
+
+    if not spans and _CLOSED_RE.search(text):
+        # "Friday closed" / "Closed on Sunday" - hours doosri clause mein hain
+        closed |= excluded or set(_days(head) or [])
+    return spans, closed
+
+
+def parse_opening_hours(entries):
+    """contacts_and_hours list → sorted, de-duplicated [(day, open_minute, close_minute)]."""
+    if isinstance(entries, str):
+        entries = [entries]  # commas pe _clauses todta hai
+    if not isinstance(entries, (list, tuple)):
+        return []
+
+    spans, closed = set(), set()
+    for entry in entries:
+        for clause in _clauses(str(entry)):
+            clause_spans, clause_closed = _parse_clause(clause)
+            spans |= clause_spans
+            closed |= clause_closed
+    # band din ki hours hatao - order se farq nahi padta ("Fri closed, Mon-Sun 8am-10pm")
+    # overnight spill (Thu 6pm-2am → Fri 00:00-02:00) Thursday ka hai, woh rehta hai
+    return sorted({span[1:] for span in spans if span[0] not in closed})
+
+
+def local_day_minute(moment=None):
+    """(weekday, minute of day) in RESTAURANT_TIME_ZONE; naive datetimes are taken as local already."""
+    zone = ZoneInfo(RESTAURANT_TIME_ZONE)
+    moment = moment or datetime.now(zone)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(zone)
+    return moment.weekday(), moment.hour * 60 + moment.minute
@@ -1,3 +1,9 @@
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Max, Min, Q, Value
+from django.db.models.functions import Cast, Floor
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
@@ -5,26 +11,136 @@ from rest_framework import status
 from .models import Restaurant
 from .serializers import RestaurantSerializer
 
+PRICE_PAGE_SIZE = 20
+PRICE_HISTOGRAM_BUCKETS = 10
+
+
+def _decimal_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"'{name}' must be a number")
+
+
+def _encode_cursor(restaurant):
+    raw = json.dumps([str(restaurant.average_room_rent), restaurant.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        rent, restaurant_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return Decimal(rent), int(restaurant_id)
+    except (ValueError, TypeError, InvalidOperation):
+        raise ValueError("Invalid cursor")
+
+
+def _histogram(queryset, low, high, buckets):
+    """[{"min", "max", "count"}] - equal-width buckets over low..high, ek grouped query"""
+    if low is None or high is None:
+        return []
+    width = (high - low) / buckets if high > low else Decimal("1")
+    bucket = Cast(
+        Floor(ExpressionWrapper(
+            (F("average_room_rent") - Value(low)) / Value(width),
+            output_field=DecimalField(max_digits=20, decimal_places=6),
+        )),
+        IntegerField(),
+    )
+    counts = [0] * buckets
+    rows = queryset.annotate(bucket=bucket).values("bucket").annotate(n=Count("id")).order_by()
+    for row in rows:
+        # rent == high → last bucket mein
+        counts[min(max(int(row["bucket"]), 0), buckets - 1)] += row["n"]
+    return [
+        {
+            "min": low + width * index,
+            "max": high if index == buckets - 1 else low + width * (index + 1),
+            "count": counts[index],
+        }
+        for index in range(buckets)
+    ]
+
+
 @api_view(["GET"])
 def filter_restaurants_by_price(request):
-    min_price = request.GET.get("min")
-    max_price = request.GET.get("max")
+    """
+    Active restaurants by average_room_rent (?min, ?max), cheapest first
+    (?order=desc for most expensive first).
 
-    queryset = Restaurant.objects.all()
+    - keyset pagination: ?limit=20, next page via ?cursor=<next_cursor>
+    - count + price bounds (price_min/price_max for the slider) in one aggregate
+      query, on the first page only
+    - ?histogram=true (&buckets=10) - counts per price bucket in one grouped query
+    """
+    try:
+        min_price = _decimal_param(request, "min")
+        max_price = _decimal_param(request, "max")
+        cursor = _decode_cursor(request.GET["cursor"]) if request.GET.get("cursor") else None
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    if min_price:
-        queryset = queryset.filter(average_room_rent__gte=min_price)
+    try:
+        limit = min(max(int(request.GET.get("limit", PRICE_PAGE_SIZE)), 1), 50)
+    except ValueError:
+        limit = PRICE_PAGE_SIZE
+    try:
+        buckets = min(max(int(request.GET.get("buckets", PRICE_HISTOGRAM_BUCKETS)), 1), 50)
+    except ValueError:
+        buckets = PRICE_HISTOGRAM_BUCKETS
+    descending = request.GET.get("order") == "desc"
 
-    if max_price:
-        queryset = queryset.filter(average_room_rent__lte=max_price)
+    # ✅ (is_active, average_room_rent, id) index - filter, order aur keyset teeno isi pe
+    active = Restaurant.objects.filter(is_active=True, average_room_rent__isnull=False)
+    price_range = Q()
+    if min_price is not None:
+        price_range &= Q(average_room_rent__gte=min_price)
+    if max_price is not None:
+        price_range &= Q(average_room_rent__lte=max_price)
 
-    serializer = RestaurantSerializer(queryset, many=True)
+    # count/bounds sirf pehle page pe (cursor pages pe client ke paas pehle se hain)
+    totals = {"count": None, "price_min": None, "price_max": None}
+    if cursor is None or request.GET.get("histogram") == "true":
+        totals = active.aggregate(
+            count=Count("id", filter=price_range) if price_range else Count("id"),
+            price_min=Min("average_room_rent"),
+            price_max=Max("average_room_rent"),
+        )
 
-    return Response(
-        {
-            "success": True,
-            "count": len(serializer.data),
-            "results": serializer.data,
-        },
-        status=status.HTTP_200_OK
-    )
+    queryset = active.filter(price_range)
+    if descending:
+        queryset = queryset.order_by("-average_room_rent", "-id")
+    else:
+        queryset = queryset.order_by("average_room_rent", "id")
+    if cursor:
+        rent, restaurant_id = cursor
+        # extra <=/>= bound → index range scan seedha cursor se shuru hota hai
+        if descending:
+            after = Q(average_room_rent__lte=rent) & (
+                Q(average_room_rent__lt=rent) | Q(average_room_rent=rent, id__lt=restaurant_id)
+            )
+        else:
+            after = Q(average_room_rent__gte=rent) & (
+                Q(average_room_rent__gt=rent) | Q(average_room_rent=rent, id__gt=restaurant_id)
+            )
+        queryset = queryset.filter(after)
+
+    page = list(queryset[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    data = {
+        "success": True,
+        "count": totals["count"],
+        "price_min": totals["price_min"],
+        "price_max": totals["price_max"],
+        "next_cursor": _encode_cursor(page[-1]) if has_more else None,
+        "results": RestaurantSerializer(page, many=True).data,
+    }
+    if request.GET.get("histogram") == "true":
+        data["histogram"] = _histogram(active, totals["price_min"], totals["price_max"], buckets)
+
+    return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Business', '0002_restaurant_average_room_rent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['is_active', 'average_room_rent', 'id'], name='restaurant_active_rent_idx'),
+        ),
+    ]
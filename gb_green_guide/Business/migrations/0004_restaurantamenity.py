@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def backfill_amenities(apps, schema_editor):
+    Restaurant = apps.get_model('Business', 'Restaurant')
+    RestaurantAmenity = apps.get_model('Business', 'RestaurantAmenity')
+    rows = []
+    for restaurant_id, amenities in Restaurant.objects.exclude(amenities__isnull=True).values_list('id', 'amenities').iterator():
+        if isinstance(amenities, str):
+            amenities = amenities.split(',')
+        if not isinstance(amenities, list):
+            continue
+        names = {slugify(str(item))[:100] for item in amenities if slugify(str(item))}
+        rows.extend(RestaurantAmenity(restaurant_id=restaurant_id, name=name) for name in sorted(names))
+        if len(rows) >= 1000:
+            RestaurantAmenity.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    RestaurantAmenity.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Business', '0003_restaurant_active_rent_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantAmenity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['city', 'restaurant_type', 'room_available', 'average_room_rent'], name='restaurant_search_idx'),
+        ),
+        migrations.AddField(
+            model_name='restaurantamenity',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='amenity_tags', to='Business.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurantamenity',
+            index=models.Index(fields=['name', 'restaurant'], name='restaurantamenity_name_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='restaurantamenity',
+            unique_together={('restaurant', 'name')},
+        ),
+        migrations.RunPython(backfill_amenities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from Business.hours import parse_opening_hours
+
+
+def backfill_opening_hours(apps, schema_editor):
+    Restaurant = apps.get_model('Business', 'Restaurant')
+    RestaurantOpeningHours = apps.get_model('Business', 'RestaurantOpeningHours')
+    rows = []
+    for restaurant_id, entries in Restaurant.objects.exclude(contacts_and_hours__isnull=True).values_list('id', 'contacts_and_hours').iterator():
+        rows.extend(
+            RestaurantOpeningHours(restaurant_id=restaurant_id, day=day, open_minute=open_minute, close_minute=close_minute)
+            for day, open_minute, close_minute in parse_opening_hours(entries)
+        )
+        if len(rows) >= 1000:
+            RestaurantOpeningHours.objects.bulk_create(rows)
+            rows = []
+    RestaurantOpeningHours.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Business', '0004_restaurantamenity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantOpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('open_minute', models.PositiveSmallIntegerField()),
+                ('close_minute', models.PositiveSmallIntegerField()),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_hours', to='Business.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'open_minute', 'close_minute', 'restaurant'], name='openinghours_lookup_idx'), models.Index(fields=['restaurant', 'day'], name='openinghours_restaurant_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_opening_hours, migrations.RunPython.noop),
+    ]
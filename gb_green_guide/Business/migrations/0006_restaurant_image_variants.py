@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Business', '0005_restaurantopeninghours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
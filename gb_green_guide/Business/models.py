@@ -1,7 +1,18 @@
 from django.db import models
 from django.conf import settings
+from django.utils.text import slugify
+from .hours import DAY_NAMES, parse_opening_hours
 from core.models import City   # assuming City model is inside 'core' app, adjust import as per your project
 
+def amenity_keys(amenities):
+    """["Free WiFi", "Parking "] → {"free-wifi", "parking"}"""
+    if isinstance(amenities, str):
+        amenities = amenities.split(",")
+    if not isinstance(amenities, (list, tuple)):
+        return set()
+    return {slugify(str(item))[:100] for item in amenities if slugify(str(item))}
+
+
 class Restaurant(models.Model):
     RESTAURANT_TYPES = [
         ("restaurant", "Restaurant"),
@@ -39,10 +50,22 @@ class Restaurant(models.Model):
     whatsapp_number = models.CharField(max_length=20, blank=True, null=True)
 
     image = models.ImageField(upload_to="uploads/restaurants/", blank=True, null=True)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)  # core/derivatives.py
 
     created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # ✅ price filter: active + rent range, (rent, id) keyset order
+            models.Index(fields=["is_active", "average_room_rent", "id"], name="restaurant_active_rent_idx"),
+            # ✅ hotel search: city + type + rooms + rent range
+            models.Index(
+                fields=["city", "restaurant_type", "room_available", "average_room_rent"],
+                name="restaurant_search_idx",
+            ),
+        ]
+
     def __str__(self):
         return str(self.name) if self.name else f"Restaurant #{self.id}"
     
@@ -53,6 +76,40 @@ class Restaurant(models.Model):
         if isinstance(self.amenities, str):
             self.amenities = [item.strip() for item in self.amenities.split(",") if item.strip()]
         super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "amenities" in update_fields:
+            self.sync_amenities()
+        if update_fields is None or "contacts_and_hours" in update_fields:
+            self.sync_opening_hours()
+
+    def sync_amenities(self):
+        """amenities JSON → RestaurantAmenity rows (indexed ?amenity= filter)"""
+        wanted = amenity_keys(self.amenities)
+        self.amenity_tags.exclude(name__in=wanted).delete()
+        RestaurantAmenity.objects.bulk_create(
+            [RestaurantAmenity(restaurant=self, name=name) for name in sorted(wanted)],
+            ignore_conflicts=True,
+        )
+
+    def sync_opening_hours(self):
+        """
+        contacts_and_hours text → RestaurantOpeningHours rows (?open_now / ?open_at filter).
+        Sirf badle hue spans likhe jaate hain - hours same hon to save pe koi write nahi.
+        """
+        wanted = set(parse_opening_hours(self.contacts_and_hours))
+        existing = {
+            (day, open_minute, close_minute): pk
+            for pk, day, open_minute, close_minute in self.opening_hours.values_list(
+                "pk", "day", "open_minute", "close_minute"
+            )
+        }
+        stale = [pk for span, pk in existing.items() if span not in wanted]
+        if stale:
+            RestaurantOpeningHours.objects.filter(pk__in=stale).delete()
+        RestaurantOpeningHours.objects.bulk_create([
+            RestaurantOpeningHours(restaurant=self, day=day, open_minute=open_minute, close_minute=close_minute)
+            for day, open_minute, close_minute in sorted(wanted - set(existing))
+        ])
 
 
     # ✅ WhatsApp link conversion method
@@ -61,3 +118,37 @@ class Restaurant(models.Model):
             return f"https://wa.me/{self.whatsapp_number}"
         return None
     
+
+
+# ✅ Normalized amenities (Restaurant.save sync karta hai) - ?amenity=wifi,parking filter ke liye
+class RestaurantAmenity(models.Model):
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name="amenity_tags")
+    name = models.CharField(max_length=100)  # slugified: "Free WiFi" → "free-wifi"
+
+    class Meta:
+        unique_together = ("restaurant", "name")
+        indexes = [
+            models.Index(fields=["name", "restaurant"], name="restaurantamenity_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} @ {self.restaurant_id}"
+
+
+# ✅ Weekly schedule parsed from contacts_and_hours (Restaurant.save sync karta hai)
+class RestaurantOpeningHours(models.Model):
+    DAY_CHOICES = [(index, name.title()) for index, name in enumerate(DAY_NAMES)]
+
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name="opening_hours")
+    day = models.PositiveSmallIntegerField(choices=DAY_CHOICES)  # 0 = Monday
+    open_minute = models.PositiveSmallIntegerField()   # minutes since midnight, local time
+    close_minute = models.PositiveSmallIntegerField()  # exclusive, 1440 = midnight; overnight spans split per day
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "open_minute", "close_minute", "restaurant"], name="openinghours_lookup_idx"),
+            models.Index(fields=["restaurant", "day"], name="openinghours_restaurant_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant_id} {DAY_NAMES[self.day][:3]} {self.open_minute // 60:02d}:{self.open_minute % 60:02d}-{self.close_minute // 60:02d}:{self.close_minute % 60:02d}"
@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from .models import Restaurant
+from core.images import CachedImageField, SrcsetField
+from core.uploads import SignedUploadField
 
 
 class RestaurantSerializer(serializers.ModelSerializer):
     whatsapp_link = serializers.SerializerMethodField()
+    image = CachedImageField()
+    image_upload = SignedUploadField(kind="restaurants")  # direct upload result (core/uploads.py)
+    srcset = SrcsetField()
 
     class Meta:
         model = Restaurant
@@ -24,6 +29,8 @@ class RestaurantSerializer(serializers.ModelSerializer):
             "whatsapp_number",
             "whatsapp_link",
             "image",
+            "srcset",
+            "image_upload",
             "created_at",
             "updated_at",
         ]
@@ -1,3 +1,76 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .hours import MINUTES_PER_DAY, parse_opening_hours
+from .models import Restaurant, RestaurantOpeningHours
+
+EVERY_DAY = list(range(7))
+
+
+def open_days(entries):
+    return sorted({day for day, _, _ in parse_opening_hours(entries)})
+
+
+class ParseOpeningHoursTests(SimpleTestCase):
+    def test_mixed_contacts_and_hours(self):
+        spans = parse_opening_hours(["+92 300 1234567", "info@example.com", "Mon-Sat 9:00 AM - 11:00 PM"])
+        self.assertEqual(spans, [(day, 9 * 60, 23 * 60) for day in range(6)])
+
+    def test_overnight_span_splits_across_days(self):
+        self.assertEqual(parse_opening_hours(["Sun 6pm to 2am"]), [(0, 0, 120), (6, 18 * 60, MINUTES_PER_DAY)])
+
+    def test_all_day_except_day(self):
+        spans = parse_opening_hours(["Open 24 hours except Friday"])
+        self.assertEqual(spans, [(day, 0, MINUTES_PER_DAY) for day in (0, 1, 2, 3, 5, 6)])
+
+    def test_daily_hours_except_day(self):
+        self.assertEqual(open_days(["Daily 9am-11pm except Sunday"]), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(open_days(["Closed on Sunday; daily 10am-8pm"]), [0, 1, 2, 3, 4, 5])
+
+    def test_closed_day_in_same_entry(self):
+        spans = parse_opening_hours(["Mon-Sun: 8am-10pm, Friday closed"])
+        self.assertEqual(spans, [(day, 8 * 60, 22 * 60) for day in (0, 1, 2, 3, 5, 6)])
+        self.assertEqual(open_days(["Mon-Sat 9am-5pm Sun closed"]), [0, 1, 2, 3, 4, 5])
+
+    def test_closed_day_in_any_order(self):
+        self.assertEqual(open_days(["Friday closed", "Mon-Sun: 8am-10pm"]), [0, 1, 2, 3, 5, 6])
+        self.assertEqual(open_days(["Sat-Sun closed", "Daily 10am-8pm"]), [0, 1, 2, 3, 4])
+
+    def test_closed_day_keeps_previous_night(self):
+        # Thursday raat 2 baje tak - Friday band hone se woh nahi katta
+        self.assertEqual(parse_opening_hours(["Thu 6pm-2am", "Fri closed"]), [(3, 18 * 60, MINUTES_PER_DAY), (4, 0, 120)])
+
+    def test_day_list_before_hours(self):
+        self.assertEqual(open_days(["Mon, Wed, Fri 9am-5pm"]), [0, 2, 4])
+        self.assertEqual(open_days("Mon-Fri, 9am-5pm"), [0, 1, 2, 3, 4])
+
+    def test_not_hours(self):
+        self.assertEqual(parse_opening_hours(["9-5", "0300-1234567"]), [])
+        self.assertEqual(parse_opening_hours(None), [])
+        self.assertEqual(open_days(["Open 24/7"]), EVERY_DAY)
+
+
+class RestaurantOpeningHoursSyncTests(TestCase):
+    def test_rows_follow_contacts_and_hours(self):
+        restaurant = Restaurant.objects.create(name="Cafe", contacts_and_hours="Mon-Fri 9am-5pm")
+        self.assertEqual(restaurant.opening_hours.count(), 5)
+
+        restaurant.contacts_and_hours = ["Mon-Fri 9am-5pm", "Sat 10am-2pm"]
+        restaurant.save()
+        kept = set(restaurant.opening_hours.filter(day__lt=5).values_list("pk", flat=True))
+        self.assertEqual(restaurant.opening_hours.count(), 6)
+
+        restaurant.contacts_and_hours = ["Mon-Fri 9am-5pm"]
+        restaurant.save()
+        self.assertEqual(set(restaurant.opening_hours.values_list("pk", flat=True)), kept)
+
+    def test_unchanged_hours_not_rewritten(self):
+        restaurant = Restaurant.objects.create(name="Cafe", contacts_and_hours=["Daily 8am-10pm"])
+        table = RestaurantOpeningHours._meta.db_table
+        restaurant.name = "Cafe Hunza"
+        with CaptureQueriesContext(connection) as queries:
+            restaurant.save()
+        writes = [q["sql"] for q in queries if table in q["sql"] and not q["sql"].startswith("SELECT")]
+        self.assertEqual(writes, [])
+        self.assertEqual(restaurant.opening_hours.count(), 7)
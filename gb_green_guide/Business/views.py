@@ -1,12 +1,67 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Restaurant
+from django_filters import rest_framework as django_filters
+from django.db.models import Exists, OuterRef
+from .models import Restaurant, RestaurantAmenity, RestaurantOpeningHours, amenity_keys
+from .hours import RESTAURANT_TIME_ZONE, local_day_minute
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from django.utils.dateparse import parse_datetime, parse_time
+from rest_framework.exceptions import ValidationError
 from .serializers import RestaurantSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .permissions import IsOwnerOrReadOnly, IsBusinessOwner
 
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+# 🔹 Restaurant / hotel filters - sab ek indexed query mein
+class RestaurantFilter(django_filters.FilterSet):
+    amenity = CharInFilter(method="filter_amenity")  # ?amenity=wifi,parking → dono hone chahiye
+    open_now = django_filters.BooleanFilter(method="filter_open_now")
+    open_at = django_filters.CharFilter(method="filter_open_at")  # ISO datetime ya "HH:MM" (aaj), naive → RESTAURANT_TIME_ZONE
+    min_rent = django_filters.NumberFilter(field_name="average_room_rent", lookup_expr="gte")
+    max_rent = django_filters.NumberFilter(field_name="average_room_rent", lookup_expr="lte")
+
+    class Meta:
+        model = Restaurant
+        fields = ["city", "restaurant_type", "room_available", "is_active"]
+
+    def filter_amenity(self, queryset, name, value):
+        # har amenity ek EXISTS probe on (restaurant, name) unique index
+        for amenity in sorted(amenity_keys(value)):
+            queryset = queryset.filter(
+                Exists(RestaurantAmenity.objects.filter(restaurant=OuterRef("pk"), name=amenity))
+            )
+        return queryset
+
+    def _open_at(self, queryset, moment):
+        day, minute = local_day_minute(moment)
+        # ek range scan on (day, open_minute, close_minute, restaurant) index → restaurant ids
+        open_ids = RestaurantOpeningHours.objects.filter(
+            day=day, open_minute__lte=minute, close_minute__gt=minute
+        ).values("restaurant_id")
+        return queryset.filter(pk__in=open_ids)
+
+    def filter_open_now(self, queryset, name, value):
+        return self._open_at(queryset, None) if value else queryset
+
+    def filter_open_at(self, queryset, name, value):
+        try:
+            moment, clock = parse_datetime(value), parse_time(value)
+        except ValueError:
+            moment = clock = None
+        if moment is None:
+            if clock is None:
+                raise ValidationError({"open_at": "Use an ISO datetime or HH:MM"})
+            today = datetime.now(ZoneInfo(RESTAURANT_TIME_ZONE)).date()
+            moment = datetime.combine(today, clock)
+        return self._open_at(queryset, moment)
+
+
 class RestaurantViewSet(viewsets.ModelViewSet):
     queryset = Restaurant.objects.all().order_by("-created_at")
     serializer_class = RestaurantSerializer
@@ -14,7 +69,7 @@ class RestaurantViewSet(viewsets.ModelViewSet):
 
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ["name", "restaurant_type"]  # hotel/restaurant name search
-    filterset_fields = ["city"]  # city id filter
+    filterset_class = RestaurantFilter  # city, amenity, room_available, restaurant_type, rent range
     
     def get_permissions(self):
         """
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # ✅ CityStats counters + image derivatives - see core/signals.py
+        from .signals import connect_city_stats_signals, connect_image_derivative_signals
+        connect_city_stats_signals()
+        connect_image_derivative_signals()
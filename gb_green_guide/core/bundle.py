@@ -0,0 +1,109 @@
+# core/bundle.py
+"""
+City page bundle for `/api/cities/{id}/bundle/` - city, tourist places,
+upcoming events, active restaurants and available products in one response
+instead of five API calls.
+
+Each section is one query (places + one prefetch for their images), limited
+per section, and section counts come from CityStats, so a bundle is a fixed
+6 queries however big the city is.
+
+Bundles are cached per city for CITY_BUNDLE_CACHE_TTL seconds. Every key
+carries a per-city version number; `invalidate_city_bundles` bumps the
+version, which drops all cached variants (limits, host) of that city at once.
+It runs from the core/signals.py handlers and from `refresh_city_stats`.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+
+CITY_BUNDLE_CACHE_TTL = getattr(settings, "CITY_BUNDLE_CACHE_TTL", 300)  # seconds
+BUNDLE_SECTIONS = ("tourist_places", "events", "restaurants", "products")
+BUNDLE_DEFAULT_LIMIT = 10
+BUNDLE_MAX_LIMIT = 50
+
+
+def _version_key(city_id):
+    return f"core:city-bundle-version:{city_id}"
+
+
+def invalidate_city_bundles(city_ids):
+    for city_id in {city_id for city_id in city_ids if city_id is not None}:
+        try:
+            cache.incr(_version_key(city_id))
+        except ValueError:
+            # abhi tak koi version nahi → koi cached bundle bhi nahi
+            cache.set(_version_key(city_id), 1, None)
+
+
+def bundle_cache_key(city_id, limits, host):
+    version = cache.get_or_set(_version_key(city_id), 1, None)
+    digest = hashlib.md5(repr((sorted(limits.items()), host)).encode()).hexdigest()
+    return f"core:city-bundle:{city_id}:{version}:{digest}"
+
+
+def bundle_limits(query_params):
+    """?places=5&events=3&restaurants=0&products=8 - default 10 each, max 50, 0 skips the section"""
+    aliases = {"tourist_places": "places"}
+    limits = {}
+    for section in BUNDLE_SECTIONS:
+        try:
+            limit = int(query_params.get(aliases.get(section, section), BUNDLE_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = BUNDLE_DEFAULT_LIMIT
+        limits[section] = min(max(limit, 0), BUNDLE_MAX_LIMIT)
+    return limits
+
+
+def build_city_bundle(city, limits, context):
+    """city: City with region + stats selected. Returns the bundle dict."""
+    # Business / ecommerce serializers yahan import - core load hote waqt cycle na bane
+    from Business.models import Restaurant
+    from Business.serializers import RestaurantSerializer
+    from ecommerce.models import Product
+    from ecommerce.serializers import ProductSerializer
+    from .models import Event, TouristPlace, TouristPlaceImage
+    from .serializers import CitySerializer, EventSerializer, TouristPlaceSerializer
+
+    stats = getattr(city, "stats", None)  # RelatedObjectDoesNotExist bhi AttributeError hai
+    sections = {
+        "tourist_places": (
+            TouristPlace.objects.filter(city=city)
+            .select_related("city")
+            .prefetch_related(Prefetch("extra_images", queryset=TouristPlaceImage.objects.order_by("id")))
+            .order_by("name", "id"),
+            TouristPlaceSerializer,
+            "tourist_places",
+        ),
+        "events": (
+            Event.objects.filter(city=city, date__gte=timezone.localdate()).select_related("city").order_by("date", "id"),
+            EventSerializer,
+            "upcoming_events",
+        ),
+        "restaurants": (
+            Restaurant.objects.filter(city=city, is_active=True).order_by("-created_at", "-id"),
+            RestaurantSerializer,
+            "restaurants",
+        ),
+        "products": (
+            Product.objects.filter(city=city, is_available=True)
+            .select_related("owner", "category", "city__region", "city__stats")
+            .annotate(reviews_count=Count("reviews"))
+            .order_by("-created_at", "-id"),
+            ProductSerializer,
+            "products",
+        ),
+    }
+
+    data = {"city": CitySerializer(city, context=context).data}
+    for section, (queryset, serializer_class, stat_field) in sections.items():
+        limit = limits[section]
+        rows = list(queryset[:limit]) if limit else []
+        data[section] = {
+            "count": getattr(stats, stat_field, 0),
+            "results": serializer_class(rows, many=True, context=context).data,
+        }
+    return data
@@ -0,0 +1,313 @@
+# core/catalog.py
+"""
+Bulk catalog loader for regions, cities, events and tourist places (used by
+`manage.py load_catalog`).
+
+Input files:
+- JSONL: one object per line with a "type" (region / city / event / place /
+  place_image); an event's own category goes in "event_type"
+- JSON: {"regions": [...], "cities": [...], "events": [...], "places": [...]}
+- CSV: one file per type, taken from the file name (regions.csv, cities.csv,
+  events.csv, places.csv, place_images.csv)
+
+The input is streamed once per type in dependency order (regions → cities →
+events / places → place images), so memory stays flat. Every batch is a
+bulk_create(update_conflicts=True) on the natural key:
+
+    Region(name), City(region, name), Event(city, title, date),
+    TouristPlace(city, name), TouristPlaceImage(tourist_place, image)
+
+Foreign keys resolve through in-memory name → id maps. Loading the same
+file twice changes nothing. Only the columns present in a row are updated.
+"""
+import csv
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .models import City, Event, Region, TouristPlace, TouristPlaceImage
+
+RECORD_TYPES = ("region", "city", "event", "place", "place_image")
+TYPE_ALIASES = {
+    "regions": "region",
+    "cities": "city",
+    "events": "event",
+    "places": "place",
+    "tourist_place": "place",
+    "tourist_places": "place",
+    "place_images": "place_image",
+    "images": "place_image",
+}
+EVENT_TYPES = {choice for choice, _ in Event.EVENT_TYPES}
+
+CITY_FIELDS = ("description", "image", "highlights", "altitude", "best_time_to_visit")
+EVENT_FIELDS = ("description", "image", "location", "event_calendar")
+PLACE_FIELDS = ("image", "short_description", "location_inside_city", "distance_from_main_city", "map_url")
+
+
+class CatalogError(Exception):
+    pass
+
+
+def _record_type(value):
+    value = (value or "").strip().lower()
+    return TYPE_ALIASES.get(value, value)
+
+
+def iter_records(path, fmt=None):
+    """Yield (line_number, record_type, row) from one input file."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8-sig") as fileobj:
+            for number, line in enumerate(fileobj, start=1):
+                if line.strip():
+                    row = json.loads(line)
+                    yield number, _record_type(row.get("type")), row
+    elif fmt == "json":
+        with open(path, encoding="utf-8-sig") as fileobj:
+            bundle = json.load(fileobj)
+        if not isinstance(bundle, dict):
+            raise CatalogError(f"{path}: JSON bundle must be an object of lists")
+        for key, rows in bundle.items():
+            for number, row in enumerate(rows, start=1):
+                yield number, _record_type(key), row
+    elif fmt == "csv":
+        file_type = _record_type(os.path.splitext(os.path.basename(path))[0])
+        with open(path, encoding="utf-8-sig", newline="") as fileobj:
+            for number, row in enumerate(csv.DictReader(fileobj), start=2):
+                yield number, file_type, row
+    else:
+        raise CatalogError(f"{path}: unsupported format '{fmt}' (jsonl, json, csv)")
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _lower(value):
+    return (_clean(value) or "").lower()
+
+
+def _image_list(value):
+    """JSON list ya CSV mein 'a.jpg|b.jpg'"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split("|")
+    return [name for name in (_clean(item) for item in value) if name]
+
+
+class CatalogLoader:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.loaded = Counter()
+        self.errors = []
+        self.region_ids = {}
+        self.city_ids = {}
+        self.city_by_name = {}
+        self.known_city_ids = set()
+        self.place_ids = None
+        self.touched_city_ids = set()
+
+    # ------------------------------------------------------------------
+    def load(self, paths, fmt=None):
+        for record_type in RECORD_TYPES:
+            self._before_pass(record_type)
+            batch = []
+            for path in paths:
+                for number, row_type, row in iter_records(path, fmt):
+                    if row_type not in RECORD_TYPES:
+                        if record_type == RECORD_TYPES[0]:
+                            self._error(path, number, row_type or "?", "Unknown record type")
+                        continue
+                    if row_type != record_type:
+                        continue
+                    if not isinstance(row, dict):
+                        self._error(path, number, row_type, "Record must be an object")
+                        continue
+                    batch.append((path, number, row))
+                    if len(batch) >= self.batch_size:
+                        self._flush(record_type, batch)
+                        batch = []
+            if batch:
+                self._flush(record_type, batch)
+        return self
+
+    def _before_pass(self, record_type):
+        if record_type == "city":
+            self.region_ids = {name.lower(): pk for pk, name in Region.objects.values_list("pk", "name")}
+        elif record_type == "event":
+            self._load_cities()
+
+    def _load_cities(self):
+        self.city_ids, by_name = {}, defaultdict(list)
+        for pk, name, region_name in City.objects.values_list("pk", "name", "region__name"):
+            self.known_city_ids.add(pk)
+            self.city_ids[(region_name.lower(), name.lower())] = pk
+            by_name[name.lower()].append(pk)
+        # same city name in two regions → row must say which region
+        self.city_by_name = {name: pks[0] if len(pks) == 1 else None for name, pks in by_name.items()}
+
+    def _error(self, path, number, record_type, message):
+        self.errors.append({"file": path, "line": number, "type": record_type, "error": message})
+
+    def _city_id(self, row):
+        if _clean(row.get("city_id")):
+            try:
+                city_id = int(row["city_id"])
+            except (TypeError, ValueError):
+                return None, "city_id must be an integer"
+            return (city_id, None) if city_id in self.known_city_ids else (None, f"Unknown city_id {city_id}")
+        city = _lower(row.get("city"))
+        if not city:
+            return None, "city is required"
+        region = _lower(row.get("region"))
+        if region:
+            city_id = self.city_ids.get((region, city))
+            return city_id, None if city_id else f"Unknown city '{row.get('city')}' in region '{row.get('region')}'"
+        if city not in self.city_by_name:
+            return None, f"Unknown city '{row.get('city')}'"
+        if self.city_by_name[city] is None:
+            return None, f"City '{row.get('city')}' exists in several regions, add a region"
+        return self.city_by_name[city], None
+
+    @staticmethod
+    def _values(row, fields):
+        """Sirf woh columns jo row mein hain - baaqi existing values waisi hi rehti hain"""
+        values = {field: _clean(row[field]) for field in fields if field in row}
+        if isinstance(values.get("highlights"), list):
+            values["highlights"] = ", ".join(str(item).strip() for item in values["highlights"])
+        return values
+
+    # ------------------------------------------------------------------
+    def _upsert(self, model, records, unique_fields):
+        """records: list of attname → value dicts. Returns saved objects (with pks)."""
+        key_attnames = [model._meta.get_field(field).attname for field in unique_fields]
+        by_key = {}
+        for values in records:
+            # batch mein same key dobara → aakhri row jeetti hai (ON CONFLICT ek row do baar update nahi karta)
+            by_key[tuple(values[attname] for attname in key_attnames)] = values
+        groups = defaultdict(list)
+        for values in by_key.values():
+            groups[frozenset(values)].append(values)
+
+        has_updated_at = any(field.name == "updated_at" for field in model._meta.concrete_fields)
+        saved = []
+        for columns, group in groups.items():
+            objs = [model(**values) for values in group]
+            update_fields = sorted(
+                model._meta.get_field(column).name for column in columns if column not in key_attnames
+            )
+            if has_updated_at:
+                update_fields.append("updated_at")
+            if update_fields:
+                model.objects.bulk_create(
+                    objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields
+                )
+            else:
+                model.objects.bulk_create(objs, ignore_conflicts=True)
+            saved.extend(objs)
+        self.loaded[model._meta.model_name] += len(by_key)
+        return saved
+
+    def _flush(self, record_type, batch):
+        with transaction.atomic():
+            getattr(self, f"_flush_{record_type}")(batch)
+
+    def _flush_region(self, batch):
+        records = []
+        for path, number, row in batch:
+            name = _clean(row.get("name"))
+            if not name:
+                self._error(path, number, "region", "name is required")
+                continue
+            records.append({"name": name})
+        self._upsert(Region, records, ["name"])
+
+    def _flush_city(self, batch):
+        records = []
+        for path, number, row in batch:
+            name = _clean(row.get("name"))
+            region_id = self.region_ids.get(_lower(row.get("region")))
+            if not name or not region_id:
+                self._error(path, number, "city", "name is required" if not name else f"Unknown region '{row.get('region')}'")
+                continue
+            records.append({"region_id": region_id, "name": name, **self._values(row, CITY_FIELDS)})
+        for city in self._upsert(City, records, ["region", "name"]):
+            self.touched_city_ids.add(city.pk)
+
+    def _flush_event(self, batch):
+        records = []
+        for path, number, row in batch:
+            city_id, error = self._city_id(row)
+            title = _clean(row.get("title"))
+            date = parse_date(str(_clean(row.get("date")) or ""))
+            values = self._values(row, EVENT_FIELDS)
+            if "event_type" in row:
+                values["type"] = _clean(row["event_type"])
+            missing = [field for field in ("description", "location", "type") if not values.get(field)]
+            if not error and not title:
+                error = "title is required"
+            if not error and not date:
+                error = "date must be YYYY-MM-DD"
+            if not error and missing:
+                error = f"required: {', '.join('event_type' if field == 'type' else field for field in missing)}"
+            if not error and values["type"] not in EVENT_TYPES:
+                error = f"event_type must be one of: {', '.join(sorted(EVENT_TYPES))}"
+            if error:
+                self._error(path, number, "event", error)
+                continue
+            records.append({"city_id": city_id, "title": title, "date": date, **values})
+        for event in self._upsert(Event, records, ["city", "title", "date"]):
+            self.touched_city_ids.add(event.city_id)
+
+    def _flush_place(self, batch):
+        records, images = [], {}
+        for path, number, row in batch:
+            city_id, error = self._city_id(row)
+            name = _clean(row.get("name"))
+            if not error and not name:
+                error = "name is required"
+            if error:
+                self._error(path, number, "place", error)
+                continue
+            records.append({"city_id": city_id, "name": name, **self._values(row, PLACE_FIELDS)})
+            if "images" in row:
+                images[(city_id, name)] = _image_list(row["images"])
+
+        places = self._upsert(TouristPlace, records, ["city", "name"])
+        image_rows = []
+        for place in places:
+            self.touched_city_ids.add(place.city_id)
+            if self.place_ids is not None:
+                self.place_ids[(place.city_id, place.name.lower())] = place.pk
+            for image in images.get((place.city_id, place.name), []):
+                image_rows.append({"tourist_place_id": place.pk, "image": image})
+        self._upsert(TouristPlaceImage, image_rows, ["tourist_place", "image"])
+
+    def _flush_place_image(self, batch):
+        if self.place_ids is None:
+            self.place_ids = {
+                (city_id, name.lower()): pk
+                for pk, city_id, name in TouristPlace.objects.filter(name__isnull=False).values_list("pk", "city_id", "name")
+            }
+        records = []
+        for path, number, row in batch:
+            city_id, error = self._city_id(row)
+            place_id = self.place_ids.get((city_id, _lower(row.get("place"))))
+            image = _clean(row.get("image"))
+            if not error and not place_id:
+                error = f"Unknown place '{row.get('place')}'"
+            if not error and not image:
+                error = "image is required"
+            if error:
+                self._error(path, number, "place_image", error)
+                continue
+            records.append({"tourist_place_id": place_id, "image": image})
+        self._upsert(TouristPlaceImage, records, ["tourist_place", "image"])
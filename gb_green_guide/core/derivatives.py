@@ -0,0 +1,234 @@
+# core/derivatives.py
+"""
+Responsive image derivatives - resized WebP (and AVIF when Pillow has it)
+copies of uploaded images at a few fixed widths, so phones don't download
+the multi-MB original for a thumbnail.
+
+    uploads/products/apricot.jpg
+      → derivatives/uploads/products/apricot-320w.webp, -640w.webp, -1280w.webp (+ .avif)
+
+- Resizing/encoding is CPU work, so it runs in a ProcessPoolExecutor; the
+  parent process only reads source bytes and saves results. The pool is
+  created once per process, on first use, with the "spawn" start method -
+  forking a threaded gunicorn worker could copy held locks into the child.
+- Widths never upscale: an 800px photo gets 320 + 640 + 800 (its own width).
+- The result is stored on each row using that image as `image_variants`
+  ({"webp": {"320": name, ...}, "avif": {...}}), so serializers (SrcsetField,
+  core/images.py) build the srcset with no extra queries. Rows sharing one
+  file are processed once. A rebuild deletes the files recorded by the
+  previous run, and the cached city bundles of those rows are invalidated.
+- On upload (core/signals.py) the new image is queued to a background thread
+  after commit; `manage.py build_image_derivatives` backfills existing media.
+
+Settings: IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_STORAGE (a STORAGES alias,
+e.g. a FileSystemStorage for local runs and tests), IMAGE_DERIVATIVE_WORKERS,
+IMAGE_DERIVATIVES_ASYNC (False = process inline, for tests/scripts).
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.db import close_old_connections, transaction
+
+from .bundle import invalidate_city_bundles
+from .storage import DedupStorage
+
+DERIVATIVE_WIDTHS = tuple(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (320, 640, 1280)))
+DERIVATIVE_STORAGE = getattr(settings, "IMAGE_DERIVATIVE_STORAGE", "default")
+DERIVATIVE_WORKERS = getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2)
+DERIVATIVES_ASYNC = getattr(settings, "IMAGE_DERIVATIVES_ASYNC", True)
+DERIVATIVE_PREFIX = "derivatives"
+QUALITY = {"webp": 80, "avif": 55}
+
+# (model, image field) - sab ek hi `image_variants` column rakhte hain
+IMAGE_MODELS = (
+    ("core", "City"),
+    ("core", "TouristPlace"),
+    ("core", "TouristPlaceImage"),
+    ("Business", "Restaurant"),
+    ("ecommerce", "Product"),
+)
+# row → city (srcset cached city bundles mein bhi hai, core/bundle.py)
+CITY_LOOKUPS = {
+    "City": "pk",
+    "TouristPlace": "city_id",
+    "TouristPlaceImage": "tourist_place__city_id",
+    "Restaurant": "city_id",
+    "Product": "city_id",
+}
+
+_background = None
+_pool = None  # (workers, ProcessPoolExecutor)
+_pool_lock = threading.Lock()
+
+
+def derivative_formats():
+    from PIL import features
+
+    return ["webp"] + (["avif"] if features.check("avif") else [])
+
+
+def derivative_name(source_name, width, fmt):
+    stem = os.path.splitext(source_name)[0]
+    return f"{DERIVATIVE_PREFIX}/{stem}-{width}w.{fmt}"
+
+
+def render_derivatives(data, widths, formats):
+    """
+    Worker side (process pool): original bytes → [(fmt, width, bytes)].
+    Sirf Pillow + plain data - Django ka kuch nahi, taake pickle/fork saste rahein.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    targets = sorted({min(width, image.width) for width in widths})
+    results = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=QUALITY[fmt])
+            results.append((fmt, width, buffer.getvalue()))
+    return results
+
+
+def _read(name):
+    with default_storage.open(name, "rb") as fileobj:
+        return fileobj.read()
+
+
+def _save(name, data):
+    # storage jo naam de wahi record hota hai (Cloudinary / taken names pe suffix lagta hai)
+    return storages[DERIVATIVE_STORAGE].save(name, ContentFile(data))
+
+
+def _variant_names(variants):
+    return {name for names in (variants or {}).values() for name in names.values()}
+
+
+def _record(name, variants):
+    """Store `variants` on every row using `name`; returns the derivative names those rows had before."""
+    previous, city_ids = set(), set()
+    for app_label, model_name in IMAGE_MODELS:
+        rows = apps.get_model(app_label, model_name).objects.filter(image=name)
+        for city_id, old_variants in rows.values_list(CITY_LOOKUPS[model_name], "image_variants"):
+            city_ids.add(city_id)
+            previous |= _variant_names(old_variants)
+        rows.update(image_variants=variants)
+    # .update() signals nahi bhejta - cached bundles ka srcset khud invalidate karo
+    invalidate_city_bundles(city_ids)
+    return previous
+
+
+def _store(name, rendered):
+    variants = {}
+    for fmt, width, data in rendered:
+        variants.setdefault(fmt, {})[str(width)] = _save(derivative_name(name, width, fmt), data)
+    # rebuild → pichli files hatao (naye naam record hone ke baad)
+    storage = storages[DERIVATIVE_STORAGE]
+    previous, current = _record(name, variants), _variant_names(variants)
+    released = list(previous - current)
+    if isinstance(storage, DedupStorage):
+        # same bytes → dedup ne wahi naam lauta ke ek reference aur joda; pichle run wala chhodo
+        released += previous & current
+    for stale in released:
+        try:
+            storage.delete(stale)
+        except Exception as e:
+            print(f"⚠️ Could not delete old derivative {stale}: {e}")
+    return variants
+
+
+def _process_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool[0] != workers:
+            if _pool is not None:
+                _pool[1].shutdown(wait=False)
+            _pool = (workers, ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ))
+        return _pool[1]
+
+
+def _discard_pool(pool):
+    # worker mar gaya (OOM waghera) → agli baar naya pool
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[1] is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def process_images(names, workers=DERIVATIVE_WORKERS, window=None):
+    """
+    Build derivatives for storage names. workers=0 renders in this process.
+    Returns (done, failed: {name: error}).
+    """
+    names = [name for name in dict.fromkeys(names) if name]
+    widths, formats = DERIVATIVE_WIDTHS, derivative_formats()
+    done, failed = 0, {}
+
+    if workers <= 0:
+        for name in names:
+            try:
+                _store(name, render_derivatives(_read(name), widths, formats))
+                done += 1
+            except Exception as e:
+                failed[name] = str(e)
+        return done, failed
+
+    # window = ek waqt mein kitni files memory mein (har worker ke liye kuch)
+    window = window or workers * 4
+    for start in range(0, len(names), window):
+        pool, pending = _process_pool(workers), {}
+        for name in names[start:start + window]:
+            try:
+                pending[name] = pool.submit(render_derivatives, _read(name), widths, formats)
+            except Exception as e:
+                failed[name] = str(e)
+        for name, future in pending.items():
+            try:
+                _store(name, future.result())
+                done += 1
+            except BrokenProcessPool as e:
+                _discard_pool(pool)
+                failed[name] = str(e)
+            except Exception as e:
+                failed[name] = str(e)
+    return done, failed
+
+
+def _process_in_background(names):
+    try:
+        done, failed = process_images(names)
+        for name, error in failed.items():
+            print(f"⚠️ Image derivatives failed for {name}: {error}")
+    finally:
+        close_old_connections()
+
+
+def queue_derivatives(names):
+    """After commit, build derivatives off the request thread (inline when IMAGE_DERIVATIVES_ASYNC is off)."""
+    global _background
+    names = [name for name in names if name]
+    if not names:
+        return
+    if not DERIVATIVES_ASYNC:
+        transaction.on_commit(lambda: process_images(names, workers=0))
+        return
+    if _background is None:
+        # ek thread kaafi hai - asal kaam process pool mein hota hai
+        _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-derivatives")
+    transaction.on_commit(lambda: _background.submit(_process_in_background, names))
@@ -0,0 +1,82 @@
+# core/images.py
+"""
+Image URLs for serializers, resolved once per file instead of once per row.
+
+`storage.url(name)` is not free - Cloudinary builds the delivery URL (and a
+signature when signed URLs are on) on every call - and serializers used to
+call it again for `image`, `extra_images` and `all_images`, then run
+`request.build_absolute_uri` on top.
+
+- `storage_url(name)`: LRU cache keyed on the storage name (a file's URL only
+  changes when its name does, and a re-upload gets a new name)
+- `absolute_image_url(file, request)`: relative URLs (local MEDIA_URL storage)
+  get the request's scheme + host, computed once per request
+- `CachedImageField`: drop-in serializers.ImageField using the above on read;
+  uploads work as before
+- `SrcsetField`: the image's resized WebP/AVIF derivatives (core/derivatives.py)
+  as {"webp": {"320": url, ...}, "avif": {...}}
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import storages
+from rest_framework import serializers
+
+from .derivatives import DERIVATIVE_STORAGE
+
+IMAGE_URL_CACHE_SIZE = getattr(settings, "IMAGE_URL_CACHE_SIZE", 20000)
+
+
+@lru_cache(maxsize=IMAGE_URL_CACHE_SIZE)
+def storage_url(name, alias="default"):
+    return storages[alias].url(name)
+
+
+def _request_base(request):
+    base = getattr(request, "_image_url_base", None)
+    if base is None:
+        base = request.build_absolute_uri("/").rstrip("/")
+        request._image_url_base = base
+    return base
+
+
+def absolute_image_url(file, request=None, default_base="", alias="default"):
+    """Full URL of an ImageField/FileField value (or storage name), None when empty."""
+    name = getattr(file, "name", file)
+    if not name:
+        return None
+    url = storage_url(name, alias)
+    if url.startswith(("http://", "https://", "//")):
+        return url
+    return (_request_base(request) if request is not None else default_base) + url
+
+
+class CachedImageField(serializers.ImageField):
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_null", True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return absolute_image_url(value, self.context.get("request"))
+
+
+class SrcsetField(serializers.Field):
+    """Read-only; source is the model's `image_variants` JSON."""
+    def __init__(self, **kwargs):
+        kwargs.setdefault("source", "image_variants")
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or {}
+
+    def to_representation(self, variants):
+        # derivatives ka alag storage ho sakta hai (settings.IMAGE_DERIVATIVE_STORAGE)
+        request = self.context.get("request")
+        return {
+            fmt: {width: absolute_image_url(name, request, alias=DERIVATIVE_STORAGE) for width, name in names.items()}
+            for fmt, names in variants.items()
+        }
@@ -0,0 +1,43 @@
+import os
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.derivatives import DERIVATIVE_WIDTHS, IMAGE_MODELS, derivative_formats, process_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Build resized WebP/AVIF derivatives for existing City, TouristPlace, "
+        "TouristPlaceImage, Restaurant and Product images in a process pool. "
+        "Only images without derivatives unless --rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes (0 = inline)")
+        parser.add_argument("--rebuild", action="store_true", help="Redo images that already have derivatives")
+        parser.add_argument("--limit", type=int, help="Process at most N distinct images")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        names = {}
+        for app_label, model_name in IMAGE_MODELS:
+            queryset = apps.get_model(app_label, model_name).objects.exclude(image="").exclude(image__isnull=True)
+            if not options["rebuild"]:
+                queryset = queryset.filter(image_variants__isnull=True)
+            # same file kai rows mein → ek hi baar process
+            names.update(dict.fromkeys(queryset.values_list("image", flat=True).distinct().iterator()))
+        names = list(names)[:options["limit"]] if options["limit"] else list(names)
+
+        self.stdout.write(
+            f"🖼️ {len(names)} images → widths {', '.join(map(str, DERIVATIVE_WIDTHS))} "
+            f"as {', '.join(derivative_formats())} with {options['workers']} workers"
+        )
+        done, failed = process_images(names, workers=options["workers"])
+        for name, error in list(failed.items())[:50]:
+            self.stdout.write(self.style.WARNING(f"{name}: {error}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Derivatives built for {done} images in {time.monotonic() - started:.1f}s ({len(failed)} failed)"
+        ))
@@ -0,0 +1,83 @@
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from core.models import StoredBlob
+from core.storage import hash_file
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Hash every file referenced by a FileField/ImageField and report how much "
+        "storage content-hash dedup (core/storage.py) would save. --index records "
+        "the existing files in StoredBlob so new uploads dedup against them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Parallel downloads/hashes (I/O bound)")
+        parser.add_argument("--index", action="store_true", help="Create StoredBlob rows for existing files")
+        parser.add_argument("--top", type=int, default=10, help="Show the N most duplicated files")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        references = Counter()
+        for model in apps.get_models():
+            file_fields = [field.name for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+            for field in file_fields:
+                rows = (
+                    model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                    .values_list(field, flat=True).iterator()
+                )
+                references.update(rows)
+
+        def hash_name(name):
+            try:
+                with default_storage.open(name, "rb") as fileobj:
+                    return name, hash_file(fileobj), None
+            except Exception as e:
+                return name, None, str(e)
+
+        by_hash, missing = defaultdict(list), []
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            for name, result, error in pool.map(hash_name, references):
+                if error:
+                    missing.append((name, error))
+                else:
+                    by_hash[result].append(name)
+
+        total_bytes = sum(size * len(names) for (_, size), names in by_hash.items())
+        unique_bytes = sum(size for _, size in by_hash)
+        stored_files = sum(len(names) for names in by_hash.values())
+        self.stdout.write(
+            f"📦 {sum(references.values())} references → {stored_files} stored files → {len(by_hash)} unique contents\n"
+            f"   stored: {_mb(total_bytes)}, unique: {_mb(unique_bytes)}, "
+            f"dedup would save {_mb(total_bytes - unique_bytes)} ({stored_files - len(by_hash)} files)"
+        )
+        duplicates = sorted(by_hash.items(), key=lambda item: (len(item[1]) - 1) * item[0][1], reverse=True)
+        for (sha256, size), names in duplicates[:options["top"]]:
+            if len(names) > 1:
+                self.stdout.write(f"   {len(names)}× {_mb(size)} {sha256[:12]}: {', '.join(sorted(names)[:3])}")
+        for name, error in missing[:20]:
+            self.stdout.write(self.style.WARNING(f"{name}: {error}"))
+
+        if options["index"]:
+            # har content ka ek canonical file - baaqi duplicates purane tareeqe se delete honge
+            blobs = []
+            for (sha256, size), names in by_hash.items():
+                canonical = max(sorted(names), key=lambda name: references[name])
+                blobs.append(StoredBlob(sha256=sha256, name=canonical, size=size, refcount=references[canonical]))
+            StoredBlob.objects.bulk_create(blobs, batch_size=1000, ignore_conflicts=True)
+            self.stdout.write(f"   indexed {len(blobs)} blobs")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Dedup report done in {time.monotonic() - started:.1f}s ({len(missing)} files unreadable)"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import CatalogError, CatalogLoader
+from core.stats import refresh_city_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Load / refresh regions, cities, events and tourist places (+ images) from "
+        "JSONL, JSON or CSV files. Upserts by natural key, safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Catalog files (.jsonl, .json, .csv)")
+        parser.add_argument("--format", choices=["jsonl", "json", "csv"], help="Default: from file extension")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per upsert statement")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            loader = CatalogLoader(batch_size=options["batch_size"]).load(options["paths"], options["format"])
+        except (OSError, ValueError, CatalogError) as e:
+            raise CommandError(str(e))
+
+        # bulk upserts skip the CityStats signals
+        refresh_city_stats(loader.touched_city_ids)
+
+        for error in loader.errors[:50]:
+            self.stdout.write(self.style.WARNING(
+                f"{error['file']}:{error['line']} [{error['type']}] {error['error']}"
+            ))
+        if len(loader.errors) > 50:
+            self.stdout.write(self.style.WARNING(f"... {len(loader.errors) - 50} more errors"))
+
+        summary = ", ".join(f"{count} {name}" for name, count in loader.loaded.items()) or "nothing"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Loaded {summary} in {time.monotonic() - started:.1f}s ({len(loader.errors)} rows skipped)"
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.stats import refresh_city_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount CityStats (tourist places, active restaurants, available products, "
+        "upcoming events) for every city, or only --city ids. Run daily - events "
+        "leave 'upcoming' without any write, and bulk updates skip the signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--city", type=int, action="append", dest="cities", help="City id (repeatable)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        refreshed = refresh_city_stats(options["cities"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ City stats refreshed for {refreshed} cities in {time.monotonic() - started:.1f}s"
+        ))
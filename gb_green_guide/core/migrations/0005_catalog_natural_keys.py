@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:31
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def _rename_duplicates(model, key_fields, name_field):
+    """Same natural key twice → 'Name (2)', 'Name (3)' ... (kuch delete nahi hota)."""
+    max_length = model._meta.get_field(name_field).max_length
+    duplicates = (
+        model.objects.exclude(**{f'{name_field}__isnull': True})
+        .values(*key_fields)
+        .annotate(rows=Count('id'), keep_id=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        extra = (
+            model.objects.filter(**{field: row[field] for field in key_fields})
+            .exclude(pk=row['keep_id'])
+            .order_by('pk')
+        )
+        for number, obj in enumerate(extra, start=2):
+            suffix = f' ({number})'
+            name = getattr(obj, name_field)
+            if max_length:
+                name = name[:max_length - len(suffix)]
+            setattr(obj, name_field, name + suffix)
+            obj.save(update_fields=[name_field])
+
+
+def dedupe_natural_keys(apps, schema_editor):
+    _rename_duplicates(apps.get_model('core', 'City'), ['region_id', 'name'], 'name')
+    _rename_duplicates(apps.get_model('core', 'Event'), ['city_id', 'title', 'date'], 'title')
+    _rename_duplicates(apps.get_model('core', 'TouristPlace'), ['city_id', 'name'], 'name')
+
+    # same image attached twice to one place - extra rows are pure duplicates
+    TouristPlaceImage = apps.get_model('core', 'TouristPlaceImage')
+    duplicates = (
+        TouristPlaceImage.objects.filter(tourist_place__isnull=False, image__isnull=False)
+        .values('tourist_place_id', 'image')
+        .annotate(rows=Count('id'), keep_id=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        TouristPlaceImage.objects.filter(
+            tourist_place_id=row['tourist_place_id'], image=row['image']
+        ).exclude(pk=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_citytrend'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_natural_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('region', 'name'), name='unique_city_region_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('city', 'title', 'date'), name='unique_event_city_title_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='touristplace',
+            constraint=models.UniqueConstraint(fields=('city', 'name'), name='unique_touristplace_city_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='touristplaceimage',
+            constraint=models.UniqueConstraint(fields=('tourist_place', 'image'), name='unique_touristplace_image'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def backfill_city_stats(apps, schema_editor):
+    City = apps.get_model('core', 'City')
+    CityStats = apps.get_model('core', 'CityStats')
+    sources = {
+        'tourist_places': (apps.get_model('core', 'TouristPlace'), {}),
+        'restaurants': (apps.get_model('Business', 'Restaurant'), {'is_active': True}),
+        'products': (apps.get_model('ecommerce', 'Product'), {'is_available': True}),
+        'upcoming_events': (apps.get_model('core', 'Event'), {'date__gte': timezone.localdate()}),
+    }
+    counts = {
+        field: dict(
+            model.objects.filter(city__isnull=False, **filters)
+            .values('city_id').annotate(n=Count('id')).order_by()
+            .values_list('city_id', 'n')
+        )
+        for field, (model, filters) in sources.items()
+    }
+    CityStats.objects.bulk_create(
+        [
+            CityStats(city_id=city_id, **{field: counts[field].get(city_id, 0) for field in sources})
+            for city_id in City.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_catalog_natural_keys'),
+        ('Business', '0005_restaurantopeninghours'),
+        ('ecommerce', '0012_order_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tourist_places', models.PositiveIntegerField(default=0)),
+                ('restaurants', models.PositiveIntegerField(default=0)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('upcoming_events', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='core.city')),
+            ],
+        ),
+        migrations.RunPython(backfill_city_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_city_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='touristplace',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='touristplaceimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -14,6 +14,7 @@ class City(models.Model):
     region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='cities')
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to="uploads/cities/", null=True, blank=True);
+    image_variants = models.JSONField(null=True, blank=True, editable=False)  # core/derivatives.py
     highlights = models.TextField(
         help_text="Comma-separated highlights (e.g., Snowy Mountains, Rich Culture)",
         blank=True,
@@ -24,6 +25,13 @@ class City(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True, null= True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # ✅ natural key - load_catalog isi pe upsert karta hai
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'name'], name='unique_city_region_name'),
+        ]
+
     def get_highlights_list(self):
         """Return highlights as list for use in templates or APIs"""
         if self.highlights:
@@ -55,6 +63,11 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'title', 'date'], name='unique_event_city_title_date'),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -62,6 +75,7 @@ class TouristPlace(models.Model):
     city = models.ForeignKey(City,  on_delete=models.CASCADE, related_name='tourist_places', null=True, blank=True)
     name = models.CharField(max_length=255, null=True, blank=True)
     image = models.ImageField(upload_to='uploads/toursitplaces/', null=True, blank=True)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)  # core/derivatives.py
     short_description = models.TextField(null=True, blank=True)
     location_inside_city = models.CharField(max_length=255, null=True, blank=True)
     distance_from_main_city = models.CharField(max_length=50, null=True, blank=True)
@@ -69,6 +83,11 @@ class TouristPlace(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'name'], name='unique_touristplace_city_name'),
+        ]
+
     def __str__(self):
         return self.name if self.name else "Unnamed Tourist Place"
 
@@ -86,9 +105,56 @@ class TouristPlaceImage(models.Model):
         null=True,
         blank=True
     )
+    image_variants = models.JSONField(null=True, blank=True, editable=False)  # core/derivatives.py
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tourist_place', 'image'], name='unique_touristplace_image'),
+        ]
+
     def __str__(self):
         if self.tourist_place and self.tourist_place.name:
             return f"Image of {self.tourist_place.name}"
         return "Tourist Place Image"
+
+
+# ✅ Trending cities (ecommerce update_trending command maintain karta hai)
+class CityTrend(models.Model):
+    city = models.OneToOneField(City, on_delete=models.CASCADE, related_name='trend')
+    # log2 of decayed score relative to a fixed epoch - see ecommerce/trending.py
+    log_score = models.FloatField(default=0)
+    last_event_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-log_score'], name='citytrend_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trend of {self.city_id}: {self.log_score:.2f}"
+
+
+# ✅ Per-city counters (core/stats.py refresh karta hai - signals + refresh_city_stats command)
+class CityStats(models.Model):
+    city = models.OneToOneField(City, on_delete=models.CASCADE, related_name='stats')
+    tourist_places = models.PositiveIntegerField(default=0)
+    restaurants = models.PositiveIntegerField(default=0)  # is_active=True
+    products = models.PositiveIntegerField(default=0)  # is_available=True
+    upcoming_events = models.PositiveIntegerField(default=0)  # date >= today
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats of {self.city_id}"
+
+
+# ✅ Content-hash index for DedupStorage (core/storage.py) - same bytes, one stored file
+class StoredBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)  # wrapped storage ka name / public id
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
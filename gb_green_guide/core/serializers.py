@@ -1,5 +1,10 @@
 from rest_framework import serializers
 from .models import City, Region, Event,TouristPlace,TouristPlaceImage
+from .images import CachedImageField, SrcsetField, absolute_image_url
+from .uploads import SignedUploadField
+
+# request ke baghair (shell, emails) tourist place images ka purana fallback
+LOCAL_MEDIA_BASE = "http://localhost:8000"
 
 class RegionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,14 +13,20 @@ class RegionSerializer(serializers.ModelSerializer):
 
 
 class CitySerializer(serializers.ModelSerializer):
-    tourist_places_count = serializers.IntegerField(read_only=True)
-  
+    # ✅ CityStats se (select_related('stats')) - per-request COUNT joins nahi
+    tourist_places_count = serializers.IntegerField(source='stats.tourist_places', read_only=True, default=0)
+    restaurants_count = serializers.IntegerField(source='stats.restaurants', read_only=True, default=0)
+    products_count = serializers.IntegerField(source='stats.products', read_only=True, default=0)
+    upcoming_events_count = serializers.IntegerField(source='stats.upcoming_events', read_only=True, default=0)
 
     region = RegionSerializer(read_only=True)
     region_id = serializers.PrimaryKeyRelatedField(
         queryset=Region.objects.all(), source='region', write_only=True
     )
     highlights_list = serializers.SerializerMethodField()
+    image = CachedImageField()
+    image_upload = SignedUploadField(kind='cities')  # direct upload result (core/uploads.py)
+    srcset = SrcsetField()
 
     class Meta:
         model = City
@@ -24,6 +35,8 @@ class CitySerializer(serializers.ModelSerializer):
             'description', 'image', 'highlights',
             'highlights_list', 'altitude', 'best_time_to_visit',
             'created_at', 'updated_at','tourist_places_count',
+            'restaurants_count', 'products_count', 'upcoming_events_count', 'srcset',
+            'image_upload',
         ]
 
     def get_highlights_list(self, obj):
@@ -38,12 +51,14 @@ class EventSerializer(serializers.ModelSerializer):
     city_id = serializers.PrimaryKeyRelatedField(
         queryset=City.objects.all(), source='city', write_only=True
     )
+    image = CachedImageField()
+    image_upload = SignedUploadField(kind='events')
 
     class Meta:
         model = Event
         fields = [
             'id', 'title', 'description', 'image', 'date', 'location',
-            'type', 'event_calendar', 'city', 'city_id',
+            'type', 'event_calendar', 'city', 'city_id', 'image_upload',
             'created_at', 'updated_at'
         ]
 
@@ -59,21 +74,15 @@ class EventSerializer(serializers.ModelSerializer):
 
 class TouristPlaceImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = SrcsetField()  # resized webp/avif copies
     
     class Meta:
         model = TouristPlaceImage
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'srcset']
     
     def get_image(self, obj):
-        """Return full URL for image"""
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            else:
-                # Fallback if no request context
-                return f"http://localhost:8000{obj.image.url}"
-        return None
+        """Return full URL for image (cached per file - core/images.py)"""
+        return absolute_image_url(obj.image, self.context.get('request'), LOCAL_MEDIA_BASE)
 
 
 class TouristPlaceSerializer(serializers.ModelSerializer):
@@ -90,6 +99,8 @@ class TouristPlaceSerializer(serializers.ModelSerializer):
     
     # Fix main image URL too
     image = serializers.SerializerMethodField()
+    image_upload = SignedUploadField(kind='tourist_places')
+    srcset = SrcsetField()
 
     class Meta:
         model = TouristPlace
@@ -99,6 +110,8 @@ class TouristPlaceSerializer(serializers.ModelSerializer):
             'city_name',
             'city_id',
             'image',  # main image with full URL
+            'srcset',  # main image ke resized webp/avif copies
+            'image_upload',  # write: direct upload result
             'extra_images',  # related images with full URLs
             'all_images',  # computed field with all images
             'short_description',
@@ -109,36 +122,14 @@ class TouristPlaceSerializer(serializers.ModelSerializer):
     
     def get_image(self, obj):
         """Return full URL for main image"""
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            else:
-                # Fallback if no request context
-                return f"http://localhost:8000{obj.image.url}"
-        return None
-    
+        return absolute_image_url(obj.image, self.context.get('request'), LOCAL_MEDIA_BASE)
+
     def get_all_images(self, obj):
         """Combine main image + extra images into single list with full URLs"""
-        all_imgs = []
         request = self.context.get('request')
-        
-        # Add main image first
-        if obj.image:
-            if request:
-                all_imgs.append(request.build_absolute_uri(obj.image.url))
-            else:
-                all_imgs.append(f"http://localhost:8000{obj.image.url}")
-        
-        # Add extra images
-        for extra_img in obj.extra_images.all():
-            if extra_img.image:
-                if request:
-                    all_imgs.append(request.build_absolute_uri(extra_img.image.url))
-                else:
-                    all_imgs.append(f"http://localhost:8000{extra_img.image.url}")
-        
-        return all_imgs
+        # ✅ URLs cached per file name - image / extra_images wala kaam dobara nahi hota
+        files = [obj.image] + [extra_img.image for extra_img in obj.extra_images.all()]
+        return [absolute_image_url(file, request, LOCAL_MEDIA_BASE) for file in files if file]
 
 
 
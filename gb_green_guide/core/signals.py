@@ -0,0 +1,82 @@
+# core/signals.py
+"""
+Keep CityStats (and the cached city bundles, core/bundle.py) in sync with
+single-object saves and deletes (admin, API), and queue image derivatives
+(core/derivatives.py) when an image is uploaded or replaced.
+Bulk writes (bulk_create, queryset.update/delete) don't send these signals -
+those paths refresh explicitly, and `refresh_city_stats` reconciles the rest.
+"""
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from .bundle import invalidate_city_bundles
+from .derivatives import IMAGE_MODELS, queue_derivatives
+from .models import TouristPlace
+from .stats import schedule_city_stats_refresh
+
+# lazy "app_label.Model" senders - core ko Business / ecommerce import nahi karna padta
+COUNTED_MODELS = ("core.TouristPlace", "core.Event", "Business.Restaurant", "ecommerce.Product")
+
+
+def remember_city(sender, instance, **kwargs):
+    # object dusre city mein move ho → purani city bhi refresh honi chahiye
+    instance._stats_city_id = instance.__dict__.get("city_id")
+
+
+def city_content_saved(sender, instance, **kwargs):
+    schedule_city_stats_refresh({getattr(instance, "_stats_city_id", None), instance.city_id})
+    instance._stats_city_id = instance.city_id
+
+
+def city_content_deleted(sender, instance, **kwargs):
+    schedule_city_stats_refresh({instance.city_id})
+
+
+def city_changed(sender, instance, **kwargs):
+    invalidate_city_bundles({instance.pk})
+
+
+def place_image_changed(sender, instance, **kwargs):
+    # image ki city uske tourist place se (cascade delete mein place pehle hi ja chuka hota hai)
+    city_id = TouristPlace.objects.filter(pk=instance.tourist_place_id).values_list("city_id", flat=True).first()
+    invalidate_city_bundles({city_id})
+
+
+def connect_city_stats_signals():
+    for model in COUNTED_MODELS:
+        post_init.connect(remember_city, sender=model, dispatch_uid=f"city_stats_init_{model}")
+        post_save.connect(city_content_saved, sender=model, dispatch_uid=f"city_stats_save_{model}")
+        post_delete.connect(city_content_deleted, sender=model, dispatch_uid=f"city_stats_delete_{model}")
+    for name, signal in (("save", post_save), ("delete", post_delete)):
+        signal.connect(city_changed, sender="core.City", dispatch_uid=f"city_bundle_city_{name}")
+        signal.connect(place_image_changed, sender="core.TouristPlaceImage", dispatch_uid=f"city_bundle_image_{name}")
+
+
+def _image_name(value):
+    return getattr(value, "name", value) or None
+
+
+def remember_image(sender, instance, **kwargs):
+    instance._derivative_source = _image_name(instance.__dict__.get("image"))
+
+
+def image_changing(sender, instance, **kwargs):
+    image = instance.image
+    # naya upload (abhi storage mein commit nahi hua) ya doosri file → purane variants bekaar
+    if (image and not image._committed) or _image_name(image) != getattr(instance, "_derivative_source", None):
+        instance.image_variants = None
+        instance._derivatives_stale = True
+
+
+def image_saved(sender, instance, **kwargs):
+    if getattr(instance, "_derivatives_stale", False):
+        queue_derivatives([instance.image.name] if instance.image else [])
+        instance._derivatives_stale = False
+    instance._derivative_source = _image_name(instance.image)
+
+
+def connect_image_derivative_signals():
+    for app_label, model_name in IMAGE_MODELS:
+        model = f"{app_label}.{model_name}"
+        post_init.connect(remember_image, sender=model, dispatch_uid=f"image_derivatives_init_{model}")
+        pre_save.connect(image_changing, sender=model, dispatch_uid=f"image_derivatives_pre_save_{model}")
+        post_save.connect(image_saved, sender=model, dispatch_uid=f"image_derivatives_save_{model}")
@@ -0,0 +1,80 @@
+# core/stats.py
+"""
+Denormalized per-city counters (CityStats) for the city pages:
+
+    tourist_places, restaurants (active), products (available), upcoming_events
+
+`refresh_city_stats(city_ids)` recounts the given cities - one grouped COUNT
+per table plus one upsert - so a refresh is always exact, never +1/-1 drift.
+
+Kept fresh by:
+- core/signals.py: post_save / post_delete on TouristPlace, Event, Restaurant
+  and Product (old and new city when an object moves)
+- bulk paths that skip signals (product import, load_catalog, stock
+  updates) call `refresh_city_stats` / `schedule_city_stats_refresh` directly
+- `manage.py refresh_city_stats`: full reconcile, run daily - events
+  stop being "upcoming" without any write
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .bundle import invalidate_city_bundles
+from .models import City, CityStats
+
+STAT_FIELDS = ("tourist_places", "restaurants", "products", "upcoming_events")
+
+
+def _counted_sources():
+    """(stat field, model, extra filter) - Business / ecommerce models lazily, no import cycle"""
+    return [
+        ("tourist_places", apps.get_model("core", "TouristPlace"), {}),
+        ("restaurants", apps.get_model("Business", "Restaurant"), {"is_active": True}),
+        ("products", apps.get_model("ecommerce", "Product"), {"is_available": True}),
+        ("upcoming_events", apps.get_model("core", "Event"), {"date__gte": timezone.localdate()}),
+    ]
+
+
+def _count_by_city(model, filters, city_ids):
+    queryset = model.objects.filter(city__isnull=False, **filters)
+    if city_ids is not None:
+        queryset = queryset.filter(city_id__in=city_ids)
+    return dict(queryset.values("city_id").annotate(n=Count("id")).order_by().values_list("city_id", "n"))
+
+
+def refresh_city_stats(city_ids=None):
+    """Recount stats for `city_ids` (None = every city). Returns the number of cities refreshed."""
+    cities = City.objects.all()
+    if city_ids is not None:
+        city_ids = {city_id for city_id in city_ids if city_id is not None}
+        if not city_ids:
+            return 0
+        cities = cities.filter(pk__in=city_ids)
+    # deleted cities (cascade) yahan se hi gir jaati hain - warna FK error
+    targets = list(cities.values_list("pk", flat=True))
+    if not targets:
+        return 0
+
+    counts = {field: _count_by_city(model, filters, city_ids) for field, model, filters in _counted_sources()}
+    rows = [
+        CityStats(city_id=city_id, **{field: counts[field].get(city_id, 0) for field in STAT_FIELDS})
+        for city_id in targets
+    ]
+    with transaction.atomic():
+        CityStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["city"],
+            update_fields=[*STAT_FIELDS, "updated_at"],
+        )
+    invalidate_city_bundles(targets)
+    return len(rows)
+
+
+def schedule_city_stats_refresh(city_ids):
+    """Refresh after the current transaction commits (immediately in autocommit)."""
+    city_ids = {city_id for city_id in city_ids if city_id is not None}
+    if city_ids:
+        transaction.on_commit(lambda: refresh_city_stats(city_ids))
@@ -0,0 +1,142 @@
+# core/storage.py
+"""
+Content-hash deduplicating storage.
+
+`DedupStorage` wraps the real media storage (Cloudinary in production). On
+save the upload is streamed once through sha256 (chunks spooled to a temp
+file, so big uploads don't sit in memory). If a StoredBlob with that hash
+exists, its name is returned and its refcount goes up - nothing is uploaded.
+Otherwise the bytes go to the wrapped storage and a StoredBlob is recorded.
+
+`delete(name)` only drops one reference; the file is removed from the wrapped
+storage when the last reference goes. Files saved before the wrapper (no
+StoredBlob row) are deleted directly, as before.
+
+    STORAGES = {"default": {
+        "BACKEND": "core.storage.DedupStorage",
+        "OPTIONS": {"backend": "cloudinary_storage.storage.MediaCloudinaryStorage"},
+    }}
+
+For local runs and tests pass a FileSystemStorage as `backend`.
+`manage.py dedup_report` estimates savings on existing media and can index it.
+"""
+import hashlib
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+HASH_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 5 * 1024 * 1024  # is se bada upload memory ke bajaye temp file mein
+
+
+def hash_file(fileobj):
+    """(sha256 hex, size) of a file object, read in chunks."""
+    digest, size = hashlib.sha256(), 0
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@deconstructible(path="core.storage.DedupStorage")
+class DedupStorage(Storage):
+    def __init__(self, backend="cloudinary_storage.storage.MediaCloudinaryStorage", backend_options=None):
+        self.backend_path = backend
+        self.backend_options = backend_options or {}
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(self.backend_path)(**self.backend_options)
+        return self._backend
+
+    # ------------------------------------------------------------------
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        # ek hi pass: hash + spool (upload stream dobara nahi padhna padta)
+        spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        digest, size = hashlib.sha256(), 0
+        for chunk in content.chunks(HASH_CHUNK_SIZE):  # Storage.save content ko File bana deta hai
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            digest.update(chunk)
+            size += len(chunk)
+            spool.write(chunk)
+        sha256 = digest.hexdigest()
+
+        with spool:
+            existing = self._add_reference(sha256)
+            if existing:
+                return existing
+
+            spool.seek(0)
+            stored_name = self.backend.save(name, File(spool, name=name))
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(sha256=sha256, name=stored_name, size=size, refcount=1)
+        except IntegrityError:
+            # same bytes ek saath do uploads - doosra wala hata ke pehle wala use karo
+            existing = self._add_reference(sha256)
+            if existing and existing != stored_name:
+                self.backend.delete(stored_name)
+                return existing
+            raise
+        return stored_name
+
+    def _add_reference(self, sha256):
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+            if blob is None:
+                return None
+            StoredBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") + 1)
+            return blob.name
+
+    def delete(self, name):
+        from .models import StoredBlob
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") - 1)
+                return
+            if blob is not None:
+                blob.delete()
+        # aakhri reference (ya dedup se pehle ki file)
+        self.backend.delete(name)
+
+    # ------------------------------------------------------------------
+    # baaqi sab wrapped storage ka
+    def _open(self, name, mode="rb"):
+        return self.backend.open(name, mode)
+
+    def get_available_name(self, name, max_length=None):
+        return self.backend.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.backend.generate_filename(filename)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def path(self, name):
+        return self.backend.path(name)
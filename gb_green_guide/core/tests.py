@@ -1,3 +1,371 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import derivatives
+from .bundle import bundle_cache_key, bundle_limits
+from .derivatives import _variant_names, process_images
+from .images import storage_url
+from .models import City, Region, StoredBlob, TouristPlace, TouristPlaceImage
+from .storage import DedupStorage
+from .uploads import UploadError, _cloudinary_sign, issue_upload, upload_folder, verify_upload
+
+User = get_user_model()
+
+
+def local_storages(location, dedup=False):
+    default = {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {"location": location, "base_url": "/media/"},
+    }
+    if dedup:
+        default = {
+            "BACKEND": "core.storage.DedupStorage",
+            "OPTIONS": {"backend": default["BACKEND"], "backend_options": default["OPTIONS"]},
+        }
+    return {"default": default, "staticfiles": settings.STORAGES["staticfiles"]}
+
+
+class LocalMediaTestCase(TestCase):
+    """Media on a temp FileSystemStorage - tests kabhi Cloudinary tak nahi jaate"""
+
+    dedup = False
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.media_root, STORAGES=local_storages(self.media_root, dedup=self.dedup)
+        ))
+        storage_url.cache_clear()
+        self.addCleanup(storage_url.cache_clear)
+
+
+class TouristPlaceListTests(LocalMediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.city = City.objects.create(name="Hunza", region=Region.objects.create(name="Gilgit Division"))
+
+    def add_places(self, count):
+        for _ in range(count):
+            place = TouristPlace.objects.create(city=self.city, name=f"Place {TouristPlace.objects.count()}")
+            TouristPlaceImage.objects.create(tourist_place=place, image="uploads/toursitplaces/extra.jpg")
+
+    def test_unpaged_query_count(self):
+        self.add_places(1)
+        with self.assertNumQueries(2):  # places + extra_images prefetch
+            self.client.get(f"/api/tourist-places/?city_id={self.city.id}")
+        self.add_places(9)
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/tourist-places/?city_id={self.city.id}")
+
+        self.assertEqual(response.data["count"], 10)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(len(response.data["results"][0]["all_images"]), 1)
+        self.assertNotIn("next", response.data)
+
+    def test_paged_query_count(self):
+        self.add_places(12)
+        with self.assertNumQueries(3):  # count + page + prefetch
+            response = self.client.get("/api/tourist-places/?page=2&page_size=5")
+
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIn("page=3", response.data["next"])
+
+    @mock.patch("core.views.TOURIST_PLACE_LIST_LIMIT", 4)
+    def test_unpaged_list_is_capped(self):
+        self.add_places(10)
+        with self.assertNumQueries(3):  # limit + 1 places + prefetch + count
+            response = self.client.get("/api/tourist-places/")
+
+        self.assertEqual(response.data["count"], 10)
+        self.assertEqual([place["name"] for place in response.data["results"]], [f"Place {i}" for i in range(4)])
+        self.assertIn("page=2", response.data["next"])
+        self.assertIn("page_size=4", response.data["next"])
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([place["name"] for place in response.data["results"]], [f"Place {i}" for i in range(4, 8)])
+
+
+def jpeg_bytes(color="green", size=(800, 600)):
+    image = io.BytesIO()
+    Image.new("RGB", size, color).save(image, "JPEG")
+    return image.getvalue()
+
+
+def shutdown_derivative_pool():
+    if derivatives._pool is not None:
+        derivatives._discard_pool(derivatives._pool[1])
+
+
+class ImageDerivativeTests(LocalMediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.city = City.objects.create(name="Skardu", region=Region.objects.create(name="Baltistan"))
+        self.name = default_storage.save("uploads/cities/skardu.jpg", ContentFile(jpeg_bytes()))
+        City.objects.filter(pk=self.city.pk).update(image=self.name)
+
+    def derivative_files(self):
+        folder = os.path.join(self.media_root, "derivatives", "uploads", "cities")
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f"derivatives/uploads/cities/{name}" for name in os.listdir(folder))
+
+    def test_rebuild_replaces_previous_files(self):
+        self.assertEqual(process_images([self.name], workers=0), (1, {}))
+        self.city.refresh_from_db()
+        first = self.city.image_variants
+        self.assertEqual(self.derivative_files(), sorted(_variant_names(first)))
+
+        process_images([self.name], workers=0)
+        self.city.refresh_from_db()
+        # purani files delete, sirf naye recorded naam disk pe
+        self.assertEqual(self.derivative_files(), sorted(_variant_names(self.city.image_variants)))
+        self.assertEqual(set(self.city.image_variants["webp"]), {"320", "640", "800"})
+
+    def test_spawn_pool(self):
+        # asli pipeline - render spawn kiye hue worker process mein
+        self.addCleanup(shutdown_derivative_pool)
+        self.assertEqual(process_images([self.name], workers=1), (1, {}))
+        self.assertEqual(derivatives._pool[0], 1)
+        self.city.refresh_from_db()
+        self.assertEqual(set(self.city.image_variants["webp"]), {"320", "640", "800"})
+        self.assertEqual(self.derivative_files(), sorted(_variant_names(self.city.image_variants)))
+        with Image.open(os.path.join(self.media_root, self.city.image_variants["webp"]["320"])) as image:
+            self.assertEqual(image.size, (320, 240))
+
+    def test_city_bundle_invalidated(self):
+        limits = bundle_limits({})
+        cached_key = bundle_cache_key(self.city.pk, limits, "testserver")
+        process_images([self.name], workers=0)
+        self.assertNotEqual(bundle_cache_key(self.city.pk, limits, "testserver"), cached_key)
+
+    @mock.patch("core.derivatives.DERIVATIVES_ASYNC", False)
+    def test_image_change_queues_rebuild(self):
+        with mock.patch("core.derivatives.process_images", wraps=process_images) as processed:
+            city = City.objects.get(pk=self.city.pk)
+            city.image.save("hunza.jpg", ContentFile(jpeg_bytes("blue")), save=False)
+            with self.captureOnCommitCallbacks(execute=True):
+                city.save()
+            self.assertEqual(processed.call_count, 1)
+            city.refresh_from_db()
+            self.assertTrue(city.image_variants["webp"]["320"].startswith("derivatives/uploads/cities/hunza"))
+            variants = city.image_variants
+
+            # image wahi → koi rebuild nahi, variants qaim
+            city.name = "Skardu City"
+            with self.captureOnCommitCallbacks(execute=True):
+                city.save()
+            self.assertEqual(processed.call_count, 1)
+            city.refresh_from_db()
+            self.assertEqual(city.image_variants, variants)
+
+            city.image.save("deosai.jpg", ContentFile(jpeg_bytes("red")), save=False)
+            with self.captureOnCommitCallbacks(execute=True):
+                city.save()
+            self.assertEqual(processed.call_count, 2)
+            city.refresh_from_db()
+            self.assertTrue(city.image_variants["webp"]["320"].startswith("derivatives/uploads/cities/deosai"))
+
+
+class DedupStorageTests(LocalMediaTestCase):
+    dedup = True
+
+    def setUp(self):
+        super().setUp()
+        self.assertIsInstance(default_storage, DedupStorage)
+
+    def on_disk(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_same_bytes_share_one_file(self):
+        first = default_storage.save("uploads/cities/a.jpg", ContentFile(jpeg_bytes()))
+        second = default_storage.save("uploads/products/b.jpg", ContentFile(jpeg_bytes()))
+        self.assertEqual(second, first)
+        self.assertFalse(self.on_disk("uploads/products/b.jpg"))
+        self.assertEqual(StoredBlob.objects.get(name=first).refcount, 2)
+
+        other = default_storage.save("uploads/cities/c.jpg", ContentFile(jpeg_bytes("red")))
+        self.assertNotEqual(other, first)
+        self.assertEqual(StoredBlob.objects.count(), 2)
+
+    def test_delete_removes_file_at_last_reference(self):
+        name = default_storage.save("uploads/cities/a.jpg", ContentFile(jpeg_bytes()))
+        default_storage.save("uploads/cities/b.jpg", ContentFile(jpeg_bytes()))
+
+        default_storage.delete(name)
+        self.assertTrue(self.on_disk(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+
+        default_storage.delete(name)
+        self.assertFalse(self.on_disk(name))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_legacy_file_deleted_directly(self):
+        # dedup se pehle ki file - koi StoredBlob nahi
+        name = default_storage.backend.save("uploads/cities/old.jpg", ContentFile(jpeg_bytes()))
+        default_storage.delete(name)
+        self.assertFalse(self.on_disk(name))
+
+    def test_concurrent_upload_of_same_bytes(self):
+        existing = default_storage.backend.save("uploads/cities/first.jpg", ContentFile(jpeg_bytes()))
+        add_reference = default_storage._add_reference
+
+        def racing_add_reference(sha256):
+            if not StoredBlob.objects.filter(sha256=sha256).exists():
+                # doosri request ne beech mein wahi bytes save kar diye
+                StoredBlob.objects.create(sha256=sha256, name=existing, size=1, refcount=1)
+                return None
+            return add_reference(sha256)
+
+        with mock.patch.object(default_storage, "_add_reference", side_effect=racing_add_reference):
+            name = default_storage.save("uploads/cities/second.jpg", ContentFile(jpeg_bytes()))
+
+        self.assertEqual(name, existing)
+        self.assertFalse(self.on_disk("uploads/cities/second.jpg"))
+        self.assertEqual(StoredBlob.objects.get().refcount, 2)
+
+    def test_rebuilt_derivatives_keep_one_reference(self):
+        name = default_storage.save("uploads/cities/skardu.jpg", ContentFile(jpeg_bytes()))
+        city = City.objects.create(name="Skardu", region=Region.objects.create(name="Baltistan"), image=name)
+        for _ in range(3):
+            process_images([name], workers=0)
+        city.refresh_from_db()
+        variants = _variant_names(city.image_variants)
+        self.assertEqual(
+            {blob.name: blob.refcount for blob in StoredBlob.objects.filter(name__in=variants)},
+            dict.fromkeys(variants, 1),
+        )
+        self.assertTrue(all(self.on_disk(variant) for variant in variants))
+
+    def test_report_indexes_existing_files(self):
+        region = Region.objects.create(name="Baltistan")
+        shared = default_storage.backend.save("uploads/cities/shared.jpg", ContentFile(jpeg_bytes()))
+        copy = default_storage.backend.save("uploads/cities/copy.jpg", ContentFile(jpeg_bytes()))
+        City.objects.create(name="Skardu", region=region, image=shared)
+        City.objects.create(name="Shigar", region=region, image=shared)
+        City.objects.create(name="Khaplu", region=region, image=copy)
+
+        out = io.StringIO()
+        call_command("dedup_report", "--index", "--workers=1", stdout=out)
+        self.assertIn("3 references → 2 stored files → 1 unique contents", out.getvalue())
+        self.assertIn("indexed 1 blobs", out.getvalue())
+        # sab se zyada references wali file canonical
+        blob = StoredBlob.objects.get()
+        self.assertEqual((blob.name, blob.refcount), (shared, 2))
+
+        self.assertEqual(default_storage.save("uploads/cities/new.jpg", ContentFile(jpeg_bytes())), shared)
+        blob.refresh_from_db()
+        self.assertEqual(blob.refcount, 3)
+
+
+@override_settings(SIGNED_UPLOAD_BACKEND="local")
+class SignedUploadTests(LocalMediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.region = Region.objects.create(name="Baltistan")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="uploader", password="x"))
+
+    def sign(self, kind="cities"):
+        response = self.client.post("/api/uploads/sign/", {"kind": kind}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["upload_url"], "/api/uploads/local/")
+        return response.data["fields"]["token"]
+
+    def upload(self, token, content=None, filename="photo.jpg"):
+        fileobj = ContentFile(jpeg_bytes() if content is None else content, name=filename)
+        return self.client.post("/api/uploads/local/", {"token": token, "file": fileobj}, format="multipart")
+
+    def create_city(self, result):
+        return self.client.post(
+            "/api/cities/", {"name": "Skardu", "region_id": self.region.pk, "image_upload": result}, format="json"
+        )
+
+    def test_sign_upload_create(self):
+        response = self.upload(self.sign())
+        self.assertEqual(response.status_code, 201)
+        result = response.data
+        self.assertTrue(result["public_id"].startswith("uploads/cities/"))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, result["public_id"])))
+
+        response = self.create_city(result)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(City.objects.get(pk=response.data["id"]).image.name, result["public_id"])
+        self.assertNotIn("image_upload", response.data)
+
+    def test_unknown_kind(self):
+        response = self.client.post("/api/uploads/sign/", {"kind": "tourist_place_images"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_result_rejected(self):
+        result = self.upload(self.sign()).data
+        tampered = {**result, "public_id": "uploads/cities/someone-else.jpg"}
+        self.assertEqual(self.create_city(tampered).data["image_upload"], ["Invalid upload signature"])
+
+        # products ke liye upload city pe nahi lag sakta
+        product_result = self.upload(self.sign("products")).data
+        self.assertEqual(self.create_city(product_result).data["image_upload"], ["Upload does not belong to this field"])
+        escaped = {**result, "public_id": "uploads/cities/../products/x.jpg"}
+        self.assertEqual(self.create_city(escaped).data["image_upload"], ["Upload does not belong to this field"])
+        self.assertFalse(City.objects.exists())
+
+    def test_expired_token_and_result(self):
+        with mock.patch("time.time", return_value=time.time() - 700):
+            token = self.sign()
+        self.assertEqual(self.upload(token).data, {"detail": "Upload token expired"})
+        self.assertEqual(self.upload("not-a-token").data, {"detail": "Invalid upload token"})
+
+        with mock.patch("time.time", return_value=time.time() - 700):
+            result = self.upload(self.sign()).data
+        self.assertEqual(self.create_city(result).data["image_upload"], ["Upload result expired"])
+
+    def test_rejects_non_images_and_oversize_files(self):
+        response = self.upload(self.sign(), b"#!/bin/sh\necho hi\n", filename="photo.jpg")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"detail": "Upload a valid image"})
+
+        with mock.patch("core.uploads.UPLOAD_MAX_BYTES", 100):
+            response = self.upload(self.sign())
+        self.assertEqual(response.data, {"detail": "File too large (max 0 MB)"})
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, "uploads", "cities")))
+
+
+@override_settings(
+    SIGNED_UPLOAD_BACKEND="cloudinary",
+    CLOUDINARY_STORAGE={"CLOUD_NAME": "demo", "API_KEY": "key", "API_SECRET": "secret"},
+)
+class CloudinarySignedUploadTests(TestCase):
+    def test_params_carry_media_tag(self):
+        from cloudinary_storage import app_settings
+
+        user = User.objects.create_user(username="uploader", password="x")
+        upload = issue_upload(user, "cities")
+        self.assertEqual(upload["fields"]["tags"].split(","), [app_settings.MEDIA_TAG, f"user-{user.pk}"])
+        self.assertTrue(upload["fields"]["folder"].endswith("uploads/cities"))
+
+    def test_old_results_expire(self):
+        public_id = f"{upload_folder('cities')}/skardu"
+
+        def result(version):
+            signature = _cloudinary_sign({"public_id": public_id, "version": version})
+            return {"public_id": public_id, "version": version, "signature": signature}
+
+        self.assertEqual(verify_upload(result(str(int(time.time()))), "cities"), public_id)
+        with self.assertRaisesMessage(UploadError, "Upload result expired"):
+            verify_upload(result(str(int(time.time()) - 700)), "cities")
@@ -0,0 +1,187 @@
+# core/uploads.py
+"""
+Signed direct-to-storage image uploads.
+
+Multipart uploads through the API hold a gunicorn worker for two transfers
+(client → Django, Django → Cloudinary). With signed uploads:
+
+1. POST /api/uploads/sign/ {"kind": "products"} → short-lived upload params
+2. the client uploads the file straight to `upload_url` with those `fields`
+3. the client sends the result ({"public_id", "version", "signature"}) as
+   `image_upload` to the normal create/update endpoint - the API only
+   verifies the signature and records the name, no image bytes
+
+Backends (settings.SIGNED_UPLOAD_BACKEND, default: "cloudinary" when a
+Cloudinary API secret is configured, else "local"):
+- cloudinary: api_sign_request params for https://api.cloudinary.com/v1_1/<cloud>/image/upload;
+  the upload response signature is checked with the API secret
+- local: a signed, expiring token for POST /api/uploads/local/, which saves
+  into default_storage and returns the same result shape (dev / tests)
+Either way a result is only accepted for UPLOAD_SIGNATURE_TTL seconds after
+its `version` (the upload timestamp).
+
+Direct uploads skip the media storage wrapper (core/storage.py), so they are
+not content-deduplicated.
+"""
+import hmac
+import json
+import os
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework import serializers
+
+UPLOAD_SIGNATURE_TTL = getattr(settings, "UPLOAD_SIGNATURE_TTL", 600)  # seconds
+UPLOAD_MAX_BYTES = getattr(settings, "UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+UPLOAD_SALT = "core.uploads"
+
+# kind → (app_label, model, field) - folder model ke upload_to se
+UPLOAD_KINDS = {
+    "cities": ("core", "City", "image"),
+    "events": ("core", "Event", "image"),
+    "tourist_places": ("core", "TouristPlace", "image"),
+    "restaurants": ("Business", "Restaurant", "image"),
+    "products": ("ecommerce", "Product", "image"),
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+def _cloudinary_secret():
+    return (getattr(settings, "CLOUDINARY_STORAGE", None) or {}).get("API_SECRET")
+
+
+def upload_backend():
+    return getattr(settings, "SIGNED_UPLOAD_BACKEND", None) or ("cloudinary" if _cloudinary_secret() else "local")
+
+
+def upload_folder(kind):
+    """Storage folder for a kind, same as a multipart upload would use."""
+    if kind not in UPLOAD_KINDS:
+        raise UploadError(f"kind must be one of: {', '.join(sorted(UPLOAD_KINDS))}")
+    app_label, model_name, field = UPLOAD_KINDS[kind]
+    folder = apps.get_model(app_label, model_name)._meta.get_field(field).upload_to.strip("/")
+    if upload_backend() == "cloudinary":
+        # MediaCloudinaryStorage public ids pe MEDIA prefix lagata hai
+        from cloudinary_storage import app_settings
+
+        folder = f"{app_settings.PREFIX.strip('/')}/{folder}"
+    return folder
+
+
+def _sign_local(value):
+    return signing.Signer(salt=UPLOAD_SALT).signature(value)
+
+
+def issue_upload(user, kind):
+    """Params for one direct upload: {"backend", "upload_url", "fields", "expires_at"}."""
+    folder = upload_folder(kind)
+    now = int(time.time())
+    if upload_backend() == "cloudinary":
+        from cloudinary_storage import app_settings
+
+        storage_settings = settings.CLOUDINARY_STORAGE
+        # media tag zaroori - MediaCloudinaryStorage listdir/exists usi tag se resources dhoondta hai
+        params = {"timestamp": now, "folder": folder, "tags": f"{app_settings.MEDIA_TAG},user-{user.pk}"}
+        fields = {
+            **params,
+            "api_key": storage_settings["API_KEY"],
+            "signature": _cloudinary_sign(params),
+        }
+        upload_url = f"https://api.cloudinary.com/v1_1/{storage_settings['CLOUD_NAME']}/image/upload"
+    else:
+        token = signing.dumps(
+            {"user": user.pk, "folder": folder, "nonce": uuid.uuid4().hex}, salt=UPLOAD_SALT
+        )
+        fields = {"token": token}
+        upload_url = "/api/uploads/local/"
+    return {
+        "backend": upload_backend(),
+        "upload_url": upload_url,
+        "fields": fields,
+        "expires_at": now + UPLOAD_SIGNATURE_TTL,
+    }
+
+
+def _cloudinary_sign(params):
+    from cloudinary.utils import api_sign_request
+
+    return api_sign_request(params, _cloudinary_secret())
+
+
+def save_local_upload(token, fileobj):
+    """Local stand-in for the storage upload API → {"public_id", "version", "signature"}."""
+    try:
+        grant = signing.loads(token, salt=UPLOAD_SALT, max_age=UPLOAD_SIGNATURE_TTL)
+    except signing.SignatureExpired:
+        raise UploadError("Upload token expired")
+    except signing.BadSignature:
+        raise UploadError("Invalid upload token")
+    if fileobj.size > UPLOAD_MAX_BYTES:
+        raise UploadError(f"File too large (max {UPLOAD_MAX_BYTES // (1024 * 1024)} MB)")
+    try:
+        # Cloudinary image/upload bhi sirf images leta hai
+        with Image.open(fileobj) as image:
+            image.verify()
+    except Exception:
+        raise UploadError("Upload a valid image")
+    fileobj.seek(0)
+
+    extension = os.path.splitext(fileobj.name)[1].lower()[:10]
+    name = default_storage.save(f"{grant['folder']}/{uuid.uuid4().hex}{extension}", fileobj)
+    version = str(int(time.time()))
+    return {"public_id": name, "version": version, "signature": _sign_local(f"{name}:{version}")}
+
+
+def verify_upload(result, kind):
+    """Upload result from the client → storage name to record. Raises UploadError."""
+    if isinstance(result, str):
+        # multipart forms mein JSON string ke taur pe aata hai
+        try:
+            result = json.loads(result)
+        except ValueError:
+            raise UploadError("Expected {public_id, version, signature}")
+    if not isinstance(result, dict):
+        raise UploadError("Expected {public_id, version, signature}")
+    public_id, version, signature = (str(result.get(key) or "") for key in ("public_id", "version", "signature"))
+    if not public_id or not signature:
+        raise UploadError("public_id and signature are required")
+    if not public_id.startswith(upload_folder(kind) + "/") or ".." in public_id.split("/"):
+        raise UploadError("Upload does not belong to this field")
+
+    if upload_backend() == "cloudinary":
+        expected = _cloudinary_sign({"public_id": public_id, "version": version})
+    else:
+        expected = _sign_local(f"{public_id}:{version}")
+    if not hmac.compare_digest(expected, signature):
+        raise UploadError("Invalid upload signature")
+    # version = upload ka timestamp (dono backends) - purane results bhi TTL ke baad reject
+    if not version.isdigit() or int(version) < time.time() - UPLOAD_SIGNATURE_TTL:
+        raise UploadError("Upload result expired")
+    return public_id
+
+
+class SignedUploadField(serializers.Field):
+    """
+    Write-only alternative to a multipart image: takes the direct upload
+    result and stores its name on the model's image field (source="image").
+    """
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs.setdefault("source", "image")
+        kwargs.setdefault("required", False)
+        kwargs["write_only"] = True
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return verify_upload(data, self.kind)
+        except UploadError as e:
+            raise serializers.ValidationError(str(e))
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CityViewSet, RegionViewSet, EventViewSet, TouristPlaceViewSet
+from .views import CityViewSet, RegionViewSet, EventViewSet, TouristPlaceViewSet, local_upload, sign_upload
 
 router = DefaultRouter()
 router.register(r'cities', CityViewSet, basename='cities')
@@ -10,6 +10,8 @@ router.register(r'tourist-places', TouristPlaceViewSet, basename='touristplace')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('uploads/sign/', sign_upload, name='upload-sign'),
+    path('uploads/local/', local_upload, name='upload-local'),
 ]
 
 
@@ -3,13 +3,26 @@ from rest_framework import viewsets, filters,permissions
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import City, Region, Event,TouristPlace,TouristPlaceImage
 from .serializers import CitySerializer, RegionSerializer, EventSerializer, TouristPlaceSerializer,TouristPlaceImageSerializer
+from .bundle import CITY_BUNDLE_CACHE_TTL, build_city_bundle, bundle_cache_key, bundle_limits
+from django.core.cache import cache
 from django.utils import timezone
 from rest_framework.response import Response
-from django.db.models import Count
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework import status
+from .uploads import UploadError, issue_upload, save_local_upload, upload_backend
+from django.conf import settings
+from rest_framework.utils.urls import replace_query_param
+
+# ?page ke baghair tourist places list kitni lambi ho sakti hai
+TOURIST_PLACE_LIST_LIMIT = getattr(settings, 'TOURIST_PLACE_LIST_LIMIT', 100)
+
 
 class CityViewSet(viewsets.ModelViewSet):
     print('yes city is called')
-    queryset = City.objects.annotate(tourist_places_count=Count('tourist_places')).order_by('-created_at')
+    # ✅ counts CityStats se ek join mein (core/stats.py)
+    queryset = City.objects.select_related('region', 'stats').order_by('-created_at')
     serializer_class = CitySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     
@@ -39,6 +52,49 @@ class CityViewSet(viewsets.ModelViewSet):
         # ✅ Default paginated response for other cases
         return super().list(request, *args, **kwargs)
 
+    @action(detail=False, methods=["get"], url_path="trending")
+    def trending(self, request):
+        """
+        Popular cities by time-decayed order/review activity on their products.
+        Precomputed by the `update_trending` command, ?limit=N (default 10, max 50)
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except (TypeError, ValueError):
+            limit = 10
+
+        cities = (
+            self.get_queryset()
+            .select_related('region')
+            .filter(trend__isnull=False)
+            .order_by('-trend__log_score', 'id')[:limit]
+        )
+        serializer = self.get_serializer(cities, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=["get"], url_path="bundle")
+    def bundle(self, request, pk=None):
+        """
+        City page in one call: city + tourist places, upcoming events, active
+        restaurants and available products, each as {"count", "results"}.
+        Per-section limits ?places=&events=&restaurants=&products= (default 10,
+        max 50, 0 = skip). Cached per city, invalidated on any change (core/bundle.py).
+        """
+        limits = bundle_limits(request.query_params)
+        # cache hit pe DB ko touch hi nahi karna (deleted city → version bump → miss → 404)
+        cache_key = bundle_cache_key(pk, limits, request.get_host()) if str(pk).isdigit() else None
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return Response(cached)
+
+        city = self.get_object()
+        # key (version) build se pehle - beech mein invalidation hui to yeh bundle purane version pe jayega
+        cache_key = bundle_cache_key(city.pk, limits, request.get_host())
+        data = build_city_bundle(city, limits, self.get_serializer_context())
+        cache.set(cache_key, data, CITY_BUNDLE_CACHE_TTL)
+        return Response(data)
+
+
 class RegionViewSet(viewsets.ModelViewSet):
     print('yes called here')
     queryset = Region.objects.all()
@@ -122,28 +178,67 @@ class TouristPlaceViewSet(viewsets.ModelViewSet):
         return context
 
     def list(self, request, *args, **kwargs):
+        """
+        Same envelope as before ({count, message, results}), queryset evaluated once.
+        - ?page=N (&page_size=, max 100) → one page, plus next/previous
+        - no page → all matching places (one query + one images prefetch), up to
+          TOURIST_PLACE_LIST_LIMIT; more than that → the first page of that size
+          with count/next/previous, like ?page=1
+        """
         city_id = request.query_params.get('city_id')
         queryset = self.get_queryset()
 
         if city_id:
             queryset = queryset.filter(city_id=city_id)
 
-        queryset = self.filter_queryset(queryset)
-
-        if not queryset.exists():
+        queryset = self.filter_queryset(queryset).order_by('id')
+
+        paginated = bool(request.query_params.get('page'))
+        capped = False
+        if paginated:
+            places = self.paginate_queryset(queryset)
+            count = self.paginator.page.paginator.count
+        else:
+            # ✅ ek hi baar evaluate - exists()/count() ki alag queries nahi
+            places = list(queryset[:TOURIST_PLACE_LIST_LIMIT + 1])
+            count = len(places)
+            if count > TOURIST_PLACE_LIST_LIMIT:
+                # limit se zyada → pura table nahi, pehla page (baaqi next link se)
+                capped = True
+                places = places[:TOURIST_PLACE_LIST_LIMIT]
+                count = queryset.count()
+
+        if not count:
             return Response({
                 "count": 0,
                 "message": "No tourist places found in this city",
                 "results": []
             })
 
-        # Pass request context to serializer
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response({
-            "count": queryset.count(),
+        serializer = self.get_serializer(places, many=True)
+        data = {
+            "count": count,
             "message": "Tourist places retrieved successfully",
             "results": serializer.data
-        })
+        }
+        if paginated:
+            data["next"] = self.paginator.get_next_link()
+            data["previous"] = self.paginator.get_previous_link()
+        elif capped:
+            next_url = replace_query_param(request.build_absolute_uri(), 'page', 2)
+            data["next"] = replace_query_param(next_url, 'page_size', TOURIST_PLACE_LIST_LIMIT)
+            data["previous"] = None
+        return Response(data)
+
+    def paginate_queryset(self, queryset):
+        try:
+            page_size = int(self.request.query_params.get('page_size', 0))
+        except (TypeError, ValueError):
+            page_size = 0
+        # capped list ka next link bhi chalna chahiye (page_size=TOURIST_PLACE_LIST_LIMIT)
+        if 1 <= page_size <= max(100, TOURIST_PLACE_LIST_LIMIT):
+            self.paginator.page_size = page_size
+        return super().paginate_queryset(queryset)
 
 
 
@@ -226,3 +321,30 @@ class TouristPlaceViewSet(viewsets.ModelViewSet):
 #             "results": serializer.data
 #         })
 
+
+# ✅ Signed direct uploads (core/uploads.py) - image bytes Django worker se nahi guzarte
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def sign_upload(request):
+    """{"kind": "products"} → {"backend", "upload_url", "fields", "expires_at"}"""
+    try:
+        return Response(issue_upload(request.user, request.data.get("kind")))
+    except UploadError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])  # token hi permission hai (Cloudinary signature ki tarah)
+@parser_classes([MultiPartParser])
+def local_upload(request):
+    """Local stand-in for the Cloudinary upload API: token + file → {"public_id", "version", "signature"}"""
+    if upload_backend() != "local":
+        return Response({"detail": "Upload directly to storage"}, status=status.HTTP_404_NOT_FOUND)
+    fileobj = request.FILES.get("file")
+    if not fileobj:
+        return Response({"detail": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return Response(save_local_upload(request.data.get("token", ""), fileobj), status=status.HTTP_201_CREATED)
+    except UploadError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
@@ -0,0 +1,93 @@
+# ecommerce/analytics.py
+"""
+Incremental maintenance of the seller dashboard rollups
+(SellerDailyStats / SellerDailyProductStats).
+
+Views call these whenever an order is created, changes status or is deleted.
+Each call turns into at most two multi-row upserts (one per table), however
+many orders/items are involved. `backfill_seller_stats` rebuilds the same
+tables from scratch.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import SellerDailyProductStats, SellerDailyStats
+from .upsert import increment_upsert
+
+CANCELLED = "Cancelled"
+
+
+def order_day(order):
+    return timezone.localdate(order.created_at) if order.created_at else timezone.localdate()
+
+
+def _apply(changes):
+    """changes: iterable of (order, status, items, sign, include_products)."""
+    status_deltas = defaultdict(lambda: [0, Decimal("0")])
+    product_deltas = defaultdict(lambda: [0, Decimal("0")])
+
+    for order, status, items, sign, include_products in changes:
+        if not order.owner_id:
+            continue
+        day = order_day(order)
+        bucket = status_deltas[(order.owner_id, day, status or "Pending")]
+        bucket[0] += sign
+        bucket[1] += sign * (order.total_price or Decimal("0"))
+        if not include_products or status == CANCELLED:
+            continue
+        for item in items:
+            if not item.product_id:
+                continue
+            bucket = product_deltas[(order.owner_id, day, item.product_id)]
+            bucket[0] += sign * (item.quantity or 0)
+            bucket[1] += sign * (item.subtotal or Decimal("0"))
+
+    # sorted keys → same row-lock order in concurrent transactions
+    increment_upsert(
+        SellerDailyStats,
+        ["owner_id", "date", "status"],
+        ["orders", "revenue"],
+        [(*key, *status_deltas[key]) for key in sorted(status_deltas)],
+    )
+    increment_upsert(
+        SellerDailyProductStats,
+        ["owner_id", "date", "product_id"],
+        ["units", "revenue"],
+        [(*key, *product_deltas[key]) for key in sorted(product_deltas)],
+    )
+
+
+def record_orders_created(orders_with_items):
+    """orders_with_items: iterable of (order, items)."""
+    _apply((order, order.status, items, +1, True) for order, items in orders_with_items)
+
+
+def record_order_created(order, items):
+    record_orders_created([(order, items)])
+
+
+def record_order_deleted(order):
+    _apply([(order, order.status, list(order.items.all()), -1, True)])
+
+
+def record_status_change(order, old_status, new_status):
+    record_status_changes([(order, old_status, new_status)])
+
+
+def record_status_changes(changes):
+    """
+    changes: iterable of (order, old_status, new_status). Moves each order
+    between status buckets; units only change when (un)cancelled.
+    """
+    moves = []
+    for order, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        cancel_changed = (old_status == CANCELLED) != (new_status == CANCELLED)
+        items = list(order.items.all()) if cancel_changed else []
+        moves.append((order, old_status, items, -1, cancel_changed))
+        moves.append((order, new_status, items, +1, cancel_changed))
+    if moves:
+        _apply(moves)
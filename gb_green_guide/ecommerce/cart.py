@@ -0,0 +1,97 @@
+# ecommerce/cart.py
+"""
+Race-free cart mutations.
+
+CartItem is unique on (cart, product), so adding to the cart is a single
+upsert statement:
+
+    INSERT ... ON CONFLICT (cart_id, product_id)
+    DO UPDATE SET quantity = cartitem.quantity + EXCLUDED.quantity
+
+Two quick taps both land - no read-modify-write race and no duplicate rows.
+Works on PostgreSQL and SQLite (3.24+).
+"""
+from django.db import transaction
+from django.db.models import Count, F, Prefetch
+
+from .models import Cart, CartItem
+from .upsert import increment_upsert
+
+
+def increment_items(cart_id, quantities):
+    """Add {product_id: qty} to the cart in one statement, returns {product_id: new quantity}."""
+    rows = [(cart_id, product_id, qty) for product_id, qty in sorted(quantities.items()) if qty > 0]
+    returned = increment_upsert(
+        CartItem, ["cart_id", "product_id"], ["quantity"], rows,
+        returning=["product_id", "quantity"],
+    )
+    return dict(returned)
+
+
+def set_items(cart_id, quantities):
+    """Overwrite quantities for {product_id: qty} in one bulk upsert."""
+    CartItem.objects.bulk_create(
+        [
+            CartItem(cart_id=cart_id, product_id=product_id, quantity=qty)
+            for product_id, qty in sorted(quantities.items())
+        ],
+        update_conflicts=True,
+        unique_fields=["cart", "product"],
+        update_fields=["quantity"],
+    )
+
+
+def fold_operations(operations):
+    """
+    Collapse a list of (product_id, op, qty) into one final instruction per
+    product, applied in order:
+        {"set": {pid: qty}, "add": {pid: qty}, "remove": {pid, ...}}
+    """
+    state = {}
+    for product_id, op, qty in operations:
+        mode, value = state.get(product_id, ("add", 0))
+        if op == "remove":
+            state[product_id] = ("set", 0)
+        elif op == "set":
+            state[product_id] = ("set", qty)
+        else:
+            state[product_id] = (mode, value + qty)
+
+    folded = {"set": {}, "add": {}, "remove": set()}
+    for product_id, (mode, value) in state.items():
+        if mode == "set" and value == 0:
+            folded["remove"].add(product_id)
+        elif mode == "set":
+            folded["set"][product_id] = value
+        elif value > 0:
+            folded["add"][product_id] = value
+    return folded
+
+
+def decrement_item(cart_id, product_id, qty):
+    """Take `qty` off a cart line, deleting the line when it reaches zero."""
+    lines = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+    with transaction.atomic():
+        for _ in range(3):
+            if lines.filter(quantity__gt=qty).update(quantity=F("quantity") - qty):
+                return
+            if lines.filter(quantity__lte=qty).delete()[0]:
+                return
+            if not lines.exists():
+                return
+            # beech mein kisi ne quantity badha di - dobara try
+
+
+def load_cart(cart_id):
+    """Cart + items + products (with review counts) in two queries, ready for CartSerializer."""
+    items = (
+        CartItem.objects
+        .select_related("product__owner", "product__category", "product__city__region", "product__city__stats")
+        .annotate(product_reviews_count=Count("product__reviews"))
+        .order_by("id")
+    )
+    cart = Cart.objects.prefetch_related(Prefetch("items", queryset=items)).get(pk=cart_id)
+    for item in cart.items.all():
+        if item.product:
+            item.product.reviews_count = item.product_reviews_count
+    return cart
@@ -0,0 +1,86 @@
+# ecommerce/idempotency.py
+"""
+`Idempotency-Key` header support for retry-prone POST endpoints.
+
+The first request with a key runs normally and its response is stored in
+IdempotencyKey. A retry with the same key gets the stored response back
+without touching carts, orders or SMTP. Concurrent duplicates block on the
+key's row lock until the first request commits, then replay its response.
+5xx responses are rolled back (nothing stored), so the client can retry.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_HOURS = getattr(settings, "IDEMPOTENCY_TTL_HOURS", 24)
+
+
+def _fingerprint(data):
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(endpoint):
+    """Decorator for viewset actions: `@idempotent("orders-create")`"""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key or not request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > 255:
+                return Response(
+                    {"detail": f"{IDEMPOTENCY_HEADER} must be at most 255 characters"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            fingerprint = _fingerprint(request.data)
+            with transaction.atomic():
+                record, _ = IdempotencyKey.objects.get_or_create(
+                    user=request.user,
+                    key=key,
+                    defaults={"endpoint": endpoint, "request_hash": fingerprint},
+                )
+                # ✅ Duplicate requests yahan wait karti hain jab tak pehli commit na ho
+                record = IdempotencyKey.objects.select_for_update().get(pk=record.pk)
+
+                expired = record.created_at < timezone.now() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+                if expired:
+                    record.endpoint = endpoint
+                    record.request_hash = fingerprint
+                    record.status_code = None
+                    record.response_body = None
+                    record.created_at = timezone.now()
+                elif record.endpoint != endpoint or record.request_hash != fingerprint:
+                    return Response(
+                        {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                elif record.status_code is not None:
+                    replay = Response(record.response_body, status=record.status_code)
+                    replay["Idempotent-Replayed"] = "true"
+                    return replay
+
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    transaction.set_rollback(True)
+                    return response
+
+                # store exactly what the client received
+                record.status_code = response.status_code
+                record.response_body = json.loads(JSONRenderer().render(response.data))
+                record.save()
+                return response
+        return wrapper
+    return decorator
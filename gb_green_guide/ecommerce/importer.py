@@ -0,0 +1,255 @@
+# ecommerce/importer.py
+"""
+Bulk product import (CSV / JSON / JSONL) for one business owner.
+
+Used by the `products/import/` endpoint and the `import_products` command.
+
+1. One streaming pass validates every row and collects city/category names.
+2. Cities and categories are resolved with one query each (name or id,
+   case-insensitive names).
+3. Slugs are allocated in memory against the owner's existing slugs - same
+   `name`, `name-1`, `name-2` scheme as Product.save, without a query per try.
+4. Valid rows are bulk_created in batches inside one transaction.
+
+Nothing is written when a row is invalid, unless `skip_invalid` is set.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.text import slugify
+
+from core.models import City
+from core.stats import schedule_city_stats_refresh
+from .models import Product, ProductCategory
+
+PRODUCT_IMPORT_MAX_ROWS = getattr(settings, "PRODUCT_IMPORT_MAX_ROWS", 10000)
+IMPORT_BATCH_SIZE = 500
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n"}
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def read_rows(fileobj, fmt):
+    """Yield dict rows from a binary or text file object; fmt: csv / json / jsonl."""
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding="utf-8-sig")
+    if fmt == "csv":
+        yield from csv.DictReader(fileobj)
+    elif fmt == "jsonl":
+        for line in fileobj:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == "json":
+        data = json.load(fileobj)
+        if isinstance(data, dict):
+            data = data.get("products")
+        if not isinstance(data, list):
+            raise ImportFormatError("JSON must be a list of products or {\"products\": [...]}")
+        yield from data
+    else:
+        raise ImportFormatError(f"Unsupported format: {fmt}")
+
+
+def guess_format(filename):
+    name = (filename or "").lower()
+    for fmt in ("jsonl", "json", "csv"):
+        if name.endswith("." + fmt):
+            return fmt
+    return "csv"
+
+
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _decimal(value, field, errors):
+    if value == "":
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        errors[field] = "Must be a number"
+        return None
+    if number < 0 or number.as_tuple().exponent < -2 or number >= Decimal("100000000"):
+        errors[field] = "Must be a positive amount with at most 2 decimals"
+        return None
+    return number
+
+
+def _validate(row):
+    """Returns (cleaned, errors) for one input row."""
+    errors = {}
+    if not isinstance(row, dict):
+        return None, {"row": "Must be an object"}
+
+    name = _text(row, "name")
+    if not name:
+        errors["name"] = "This field is required"
+    elif len(name) > 255:
+        errors["name"] = "At most 255 characters"
+
+    price = _decimal(_text(row, "price"), "price", errors)
+    if price is None and "price" not in errors:
+        errors["price"] = "This field is required"
+    discount_price = _decimal(_text(row, "discount_price"), "discount_price", errors)
+    if price is not None and discount_price is not None and discount_price > price:
+        errors["discount_price"] = "Cannot be more than price"
+
+    stock = _text(row, "stock")
+    if stock == "":
+        stock = None  # khali = stock track nahi hota
+    elif stock.isdigit():
+        stock = int(stock)
+    else:
+        errors["stock"] = "Must be a whole number"
+
+    is_available = _text(row, "is_available").lower()
+    if is_available in ("", *TRUE_VALUES):
+        is_available = True
+    elif is_available in FALSE_VALUES:
+        is_available = False
+    else:
+        errors["is_available"] = "Must be true or false"
+
+    cleaned = {
+        "name": name,
+        "description": _text(row, "description") or None,
+        "price": price,
+        "discount_price": discount_price,
+        "stock": stock,
+        "is_available": is_available,
+        "city": _text(row, "city") or _text(row, "city_id"),
+        "category": _text(row, "category") or _text(row, "category_id"),
+    }
+    if not cleaned["city"]:
+        errors["city"] = "This field is required"
+    if not cleaned["category"]:
+        errors["category"] = "This field is required"
+    return cleaned, errors
+
+
+def _lookup(model, refs):
+    """
+    Resolve names/ids to ids in one query.
+    Returns {ref.lower(): id}, ambiguous names (several rows) are left out.
+    """
+    ids = {int(ref) for ref in refs if ref.isdigit()}
+    names = {ref.lower() for ref in refs if not ref.isdigit()}
+    if not ids and not names:
+        return {}
+    rows = (
+        model.objects.annotate(lname=Lower("name"))
+        .filter(Q(pk__in=ids) | Q(lname__in=names))
+        .values_list("pk", "lname")
+    )
+    resolved, seen = {}, {}
+    for pk, lname in rows:
+        if pk in ids:
+            resolved[str(pk)] = pk
+        if lname in names:
+            seen.setdefault(lname, []).append(pk)
+    for lname, pks in seen.items():
+        if len(pks) == 1:
+            resolved[lname] = pks[0]
+    return resolved
+
+
+class SlugAllocator:
+    """Product.save ka slug scheme (name, name-1, name-2, ...) - memory mein, bina query loop"""
+    def __init__(self, owner):
+        self.taken = set(Product.objects.filter(owner=owner).exclude(slug__isnull=True).values_list("slug", flat=True))
+        self.next_suffix = {}
+
+    def allocate(self, name):
+        base = slugify(name) or "product"
+        slug = base
+        counter = self.next_suffix.get(base, 1)
+        while slug in self.taken:
+            slug = f"{base}-{counter}"
+            counter += 1
+        self.next_suffix[base] = counter
+        self.taken.add(slug)
+        return slug
+
+
+def import_products(owner, rows, dry_run=False, skip_invalid=False, batch_size=IMPORT_BATCH_SIZE, max_rows=None):
+    """
+    rows: iterable of dicts (name, description, price, discount_price, stock,
+    is_available, city, category - city/category by name or id).
+    Returns a report: {"total_rows", "valid_rows", "created", "errors": [{"row", "errors"}], "dry_run"}.
+    """
+    cleaned_rows, errors = [], {}
+    city_refs, category_refs = set(), set()
+    total = 0
+    for number, row in enumerate(rows, start=1):
+        total = number
+        if max_rows and number > max_rows:
+            raise ImportFormatError(f"At most {max_rows} rows per import")
+        cleaned, row_errors = _validate(row)
+        if row_errors:
+            errors[number] = row_errors
+        if cleaned:
+            city_refs.add(cleaned["city"])
+            category_refs.add(cleaned["category"])
+            cleaned_rows.append((number, cleaned))
+
+    cities = _lookup(City, city_refs - {""})
+    categories = _lookup(ProductCategory, category_refs - {""})
+
+    valid = []
+    for number, cleaned in cleaned_rows:
+        city_id = cities.get(cleaned["city"].lower())
+        category_id = categories.get(cleaned["category"].lower())
+        if cleaned["city"] and city_id is None:
+            errors.setdefault(number, {})["city"] = f"Unknown or ambiguous city: {cleaned['city']}"
+        if cleaned["category"] and category_id is None:
+            errors.setdefault(number, {})["category"] = f"Unknown or ambiguous category: {cleaned['category']}"
+        if number not in errors:
+            valid.append((cleaned, city_id, category_id))
+    errors = [{"row": number, "errors": errors[number]} for number in sorted(errors)]
+
+    report = {
+        "total_rows": total,
+        "valid_rows": len(valid),
+        "created": 0,
+        "errors": errors,
+        "dry_run": dry_run,
+    }
+    if dry_run or not valid or (errors and not skip_invalid):
+        return report
+
+    with transaction.atomic():
+        slugs = SlugAllocator(owner)
+        products = [
+            Product(
+                owner=owner,
+                city_id=city_id,
+                category_id=category_id,
+                name=cleaned["name"],
+                slug=slugs.allocate(cleaned["name"]),
+                description=cleaned["description"],
+                price=cleaned["price"],
+                discount_price=cleaned["discount_price"],
+                stock=cleaned["stock"],
+                is_available=cleaned["is_available"],
+            )
+            for cleaned, city_id, category_id in valid
+        ]
+        Product.objects.bulk_create(products, batch_size=batch_size)
+        # bulk_create signals nahi bhejta → CityStats khud refresh
+        schedule_city_stats_refresh({product.city_id for product in products})
+    report["created"] = len(products)
+    return report
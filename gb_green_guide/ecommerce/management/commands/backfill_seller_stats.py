@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+from ecommerce.models import Order, OrderItem, SellerDailyProductStats, SellerDailyStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the seller dashboard rollups (SellerDailyStats, "
+        "SellerDailyProductStats) from Order/OrderItem with grouped queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, help="Only rebuild this seller (user id)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+
+        orders = Order.objects.filter(owner__isnull=False)
+        items = OrderItem.objects.filter(order__owner__isnull=False, product__isnull=False)
+        order_stats = SellerDailyStats.objects.all()
+        product_stats = SellerDailyProductStats.objects.all()
+        if options["owner"]:
+            orders = orders.filter(owner_id=options["owner"])
+            items = items.filter(order__owner_id=options["owner"])
+            order_stats = order_stats.filter(owner_id=options["owner"])
+            product_stats = product_stats.filter(owner_id=options["owner"])
+
+        order_rows = (
+            orders.order_by()
+            .annotate(day=TruncDate("created_at"), order_status=Coalesce("status", Value("Pending")))
+            .values("owner_id", "day", "order_status")
+            .annotate(orders_count=Count("id"), revenue_sum=Sum("total_price"))
+        )
+        item_rows = (
+            items.exclude(order__status="Cancelled")
+            .order_by()
+            .annotate(day=TruncDate("order__created_at"))
+            .values("order__owner_id", "day", "product_id")
+            .annotate(units_sum=Sum("quantity"), revenue_sum=Sum("subtotal"))
+        )
+
+        with transaction.atomic():
+            order_stats.delete()
+            product_stats.delete()
+            created_orders = self._bulk_insert(
+                (
+                    SellerDailyStats(
+                        owner_id=row["owner_id"],
+                        date=row["day"],
+                        status=row["order_status"],
+                        orders=row["orders_count"],
+                        revenue=row["revenue_sum"] or 0,
+                    )
+                    for row in order_rows.iterator()
+                    if row["day"] is not None
+                ),
+                SellerDailyStats,
+                batch_size,
+            )
+            created_products = self._bulk_insert(
+                (
+                    SellerDailyProductStats(
+                        owner_id=row["order__owner_id"],
+                        date=row["day"],
+                        product_id=row["product_id"],
+                        units=row["units_sum"] or 0,
+                        revenue=row["revenue_sum"] or 0,
+                    )
+                    for row in item_rows.iterator()
+                    if row["day"] is not None
+                ),
+                SellerDailyProductStats,
+                batch_size,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Backfilled {created_orders} daily order rows and {created_products} "
+            f"daily product rows in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _bulk_insert(self, objects, model, batch_size):
+        batch = []
+        total = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            total += len(batch)
+        return total
@@ -0,0 +1,134 @@
+import heapq
+import time
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ecommerce.models import OrderItem, RelatedProduct
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the 'customers also bought' table from OrderItem history. "
+        "Streams order items grouped by order, counts product pairs and keeps "
+        "the top-k neighbours per product. Use --incremental to fold in only "
+        "orders placed since the last build."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=20, help="Neighbours kept per product")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only process orders created after the last build",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per DB round trip")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk_create")
+        parser.add_argument(
+            "--max-basket",
+            type=int,
+            default=50,
+            help="Ignore orders with more distinct products than this (pairs grow quadratically)",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        top_k = options["top_k"]
+        run_started = timezone.now()
+
+        since = None
+        if options["incremental"]:
+            since = RelatedProduct.objects.aggregate(last=Max("computed_through"))["last"]
+            if since is None:
+                self.stdout.write("No previous build found, running a full build.")
+
+        pair_counts, orders_seen, items_seen = self._count_pairs(
+            since=since,
+            until=run_started,
+            chunk_size=options["chunk_size"],
+            max_basket=options["max_basket"],
+        )
+
+        with transaction.atomic():
+            if since is None:
+                RelatedProduct.objects.all().delete()
+            else:
+                self._merge_existing(pair_counts)
+            rows_written = self._write_top_k(
+                pair_counts, top_k, run_started, options["batch_size"]
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {'Incremental' if since else 'Full'} build: {items_seen} order items, "
+            f"{orders_seen} orders, {len(pair_counts)} products, {rows_written} links "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _count_pairs(self, since, until, chunk_size, max_basket):
+        """Stream (order_id, product_id) sorted by order and count co-occurring pairs."""
+        items = (
+            OrderItem.objects
+            .filter(product__isnull=False, order__created_at__lte=until)
+            .exclude(order__status="Cancelled")
+        )
+        if since is not None:
+            items = items.filter(order__created_at__gt=since)
+
+        rows = items.order_by("order_id").values_list("order_id", "product_id").iterator(chunk_size=chunk_size)
+
+        pair_counts = defaultdict(Counter)
+        orders_seen = items_seen = 0
+        for _, group in groupby(rows, key=itemgetter(0)):
+            basket = {product_id for _, product_id in group}
+            orders_seen += 1
+            items_seen += len(basket)
+            if len(basket) < 2 or len(basket) > max_basket:
+                continue
+            for a, b in combinations(sorted(basket), 2):
+                pair_counts[a][b] += 1
+                pair_counts[b][a] += 1
+        return pair_counts, orders_seen, items_seen
+
+    def _merge_existing(self, pair_counts):
+        """
+        Incremental mode: add the stored top-k scores of touched products to the
+        new counts, then drop their old rows. Untouched products keep their rows.
+        Neighbours that previously fell outside top-k are not recovered - run a
+        full build periodically to correct that drift.
+        """
+        product_ids = list(pair_counts)
+        for start in range(0, len(product_ids), 1000):
+            chunk = product_ids[start:start + 1000]
+            existing = RelatedProduct.objects.filter(product_id__in=chunk).values_list(
+                "product_id", "related_id", "score"
+            )
+            for product_id, related_id, score in existing:
+                pair_counts[product_id][related_id] += score
+            RelatedProduct.objects.filter(product_id__in=chunk).delete()
+
+    def _write_top_k(self, pair_counts, top_k, computed_through, batch_size):
+        batch = []
+        written = 0
+        for product_id, neighbours in pair_counts.items():
+            # ties → lower product id first, taake result deterministic rahe
+            best = heapq.nlargest(top_k, neighbours.items(), key=lambda kv: (kv[1], -kv[0]))
+            for related_id, score in best:
+                batch.append(RelatedProduct(
+                    product_id=product_id,
+                    related_id=related_id,
+                    score=score,
+                    computed_through=computed_through,
+                ))
+            if len(batch) >= batch_size:
+                RelatedProduct.objects.bulk_create(batch, batch_size=batch_size)
+                written += len(batch)
+                batch = []
+        if batch:
+            RelatedProduct.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
+        return written
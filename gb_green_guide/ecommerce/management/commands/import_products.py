@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ecommerce.importer import ImportFormatError, guess_format, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import products for a business owner from CSV / JSON / JSONL "
+        "(columns: name, description, price, discount_price, stock, is_available, city, category)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Import file")
+        parser.add_argument("--owner", required=True, help="Owner username or user id")
+        parser.add_argument("--format", choices=["csv", "json", "jsonl"], help="Default: from file extension")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk_create")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, save nothing")
+        parser.add_argument("--skip-invalid", action="store_true", help="Save valid rows even if some rows fail")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        owner_ref = options["owner"]
+        lookup = {"pk": int(owner_ref)} if owner_ref.isdigit() else {"username": owner_ref}
+        try:
+            owner = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {owner_ref}")
+
+        started = time.monotonic()
+        fmt = options["format"] or guess_format(options["path"])
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = import_products(
+                    owner,
+                    read_rows(fileobj, fmt),
+                    dry_run=options["dry_run"],
+                    skip_invalid=options["skip_invalid"],
+                    batch_size=options["batch_size"],
+                )
+        except (OSError, ImportFormatError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        for entry in report["errors"][:50]:
+            details = "; ".join(f"{field}: {message}" for field, message in entry["errors"].items())
+            self.stdout.write(self.style.WARNING(f"Row {entry['row']}: {details}"))
+        if len(report["errors"]) > 50:
+            self.stdout.write(self.style.WARNING(f"... {len(report['errors']) - 50} more rows with errors"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['total_rows']} rows read, {report['valid_rows']} valid, "
+            f"{report['created']} products created in {time.monotonic() - started:.1f}s"
+            + (" (dry run)" if report["dry_run"] else "")
+        ))
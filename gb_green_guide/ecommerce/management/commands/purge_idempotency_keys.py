@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ecommerce.idempotency import IDEMPOTENCY_TTL_HOURS
+from ecommerce.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than IDEMPOTENCY_TTL_HOURS (run daily)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows deleted per statement")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        deleted = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(created_at__lt=cutoff)
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Purged {deleted} expired idempotency keys"))
@@ -0,0 +1,36 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ecommerce.models import StockHold
+from ecommerce.stock import release_stock
+
+
+class Command(BaseCommand):
+    help = "Return expired cart stock holds to product stock (run every minute or so)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Holds released per transaction")
+
+    def handle(self, *args, **options):
+        released = 0
+        while True:
+            with transaction.atomic():
+                # checkout mein lock hui holds skip karo - woh wahan consume ho rahi hain
+                holds = list(
+                    StockHold.objects.select_for_update(skip_locked=True)
+                    .filter(expires_at__lte=timezone.now())
+                    .order_by("id")[:options["batch_size"]]
+                )
+                if not holds:
+                    break
+                quantities = Counter()
+                for hold in holds:
+                    quantities[hold.product_id] += hold.quantity
+                release_stock(quantities)
+                StockHold.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+                released += len(holds)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Released {released} expired stock holds"))
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import CityTrend
+from ecommerce.models import OrderItem, ProductTrend, Review
+from ecommerce.trending import ORDER_ITEM_WEIGHT, REVIEW_WEIGHT, event_log_score, log_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Update time-decayed trending scores for products and cities. "
+        "Only order items and reviews newer than the last run are read, so run "
+        "this on a schedule (e.g. every 10 minutes). --rebuild starts over from "
+        "the last --days of history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Drop scores and rebuild from --days of history")
+        parser.add_argument("--days", type=int, default=30, help="History window for a rebuild")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per DB round trip")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        now = timezone.now()
+
+        since = None
+        if not options["rebuild"]:
+            since = ProductTrend.objects.aggregate(last=Max("last_event_at"))["last"]
+        rebuild = since is None
+        if rebuild:
+            since = now - timedelta(days=options["days"])
+
+        product_scores, city_scores, events = self._collect_events(since, now, options["chunk_size"])
+
+        with transaction.atomic():
+            if rebuild:
+                ProductTrend.objects.all().delete()
+                CityTrend.objects.all().delete()
+            self._apply(ProductTrend, "product_id", product_scores)
+            self._apply(CityTrend, "city_id", city_scores)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Trending {'rebuilt' if rebuild else 'updated'}: {events} events, "
+            f"{len(product_scores)} products, {len(city_scores)} cities "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def _collect_events(self, since, until, chunk_size):
+        """Fold new events into {id: (log_score, last_event_at)} per product and city."""
+        product_scores = {}
+        city_scores = {}
+        events = 0
+
+        def add(scores, key, log_score, when):
+            previous, last_seen = scores.get(key, (None, when))
+            scores[key] = (log_add(previous, log_score), max(last_seen, when))
+
+        order_items = (
+            OrderItem.objects
+            .filter(product__isnull=False, order__created_at__gt=since, order__created_at__lte=until)
+            .exclude(order__status="Cancelled")
+            .values_list("product_id", "product__city_id", "order__created_at")
+        )
+        for product_id, city_id, created_at in order_items.iterator(chunk_size=chunk_size):
+            log_score = event_log_score(ORDER_ITEM_WEIGHT, created_at)
+            add(product_scores, product_id, log_score, created_at)
+            if city_id:
+                add(city_scores, city_id, log_score, created_at)
+            events += 1
+
+        reviews = (
+            Review.objects
+            .filter(created_at__gt=since, created_at__lte=until)
+            .values_list("product_id", "product__city_id", "created_at", "rating")
+        )
+        for product_id, city_id, created_at, rating in reviews.iterator(chunk_size=chunk_size):
+            # 5⭐ review = full weight, 1⭐ = 1/5
+            log_score = event_log_score(REVIEW_WEIGHT * max(rating or 1, 1) / 5, created_at)
+            add(product_scores, product_id, log_score, created_at)
+            if city_id:
+                add(city_scores, city_id, log_score, created_at)
+            events += 1
+
+        return product_scores, city_scores, events
+
+    def _apply(self, model, key_field, scores):
+        """Merge new scores into existing rows - only touched ids are read/written."""
+        keys = list(scores)
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            existing = {
+                getattr(row, key_field): row
+                for row in model.objects.filter(**{f"{key_field}__in": chunk})
+            }
+            to_update, to_create = [], []
+            for key in chunk:
+                log_score, last_event_at = scores[key]
+                row = existing.get(key)
+                if row is None:
+                    to_create.append(model(**{
+                        key_field: key,
+                        "log_score": log_score,
+                        "last_event_at": last_event_at,
+                    }))
+                else:
+                    row.log_score = log_add(row.log_score, log_score)
+                    row.last_event_at = max(row.last_event_at, last_event_at)
+                    to_update.append(row)
+            model.objects.bulk_create(to_create)
+            model.objects.bulk_update(to_update, ["log_score", "last_event_at"])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0004_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('computed_through', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='ecommerce.product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='ecommerce.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', '-score'], name='relatedproduct_top_idx')],
+                'unique_together': {('product', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0005_relatedproduct'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_score', models.FloatField(default=0)),
+                ('last_event_at', models.DateTimeField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trend', to='ecommerce.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-log_score'], name='producttrend_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0006_producttrend'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerDailyProductStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_product_stats', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='ecommerce.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Seller daily product stats',
+                'unique_together': {('owner', 'date', 'product')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SellerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Confirmed', 'Confirmed'), ('Shipped', 'Shipped'), ('Delivered', 'Delivered'), ('Cancelled', 'Cancelled')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Seller daily stats',
+                'unique_together': {('owner', 'date', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0007_sellerdailyproductstats_sellerdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to='ecommerce.cart')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to='ecommerce.product')),
+            ],
+            options={
+                'unique_together': {('cart', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    """Fold duplicate (cart, product) lines into one before adding the constraint."""
+    CartItem = apps.get_model('ecommerce', 'CartItem')
+    duplicates = (
+        CartItem.objects.filter(cart__isnull=False, product__isnull=False)
+        .values('cart_id', 'product_id')
+        .annotate(lines=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(lines__gt=1)
+    )
+    for row in duplicates:
+        CartItem.objects.filter(pk=row['keep_id']).update(quantity=row['total'])
+        CartItem.objects.filter(
+            cart_id=row['cart_id'], product_id=row['product_id']
+        ).exclude(pk=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0008_stockhold'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='unique_cart_product'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:19
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# full_name icontains → UPPER(full_name::text) LIKE UPPER('%...%'); trigram GIN isko index se chalata hai
+TRGM_INDEX = "order_full_name_trgm_idx"
+
+
+def create_full_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = schema_editor.quote_name(apps.get_model("ecommerce", "Order")._meta.db_table)
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON {table} "
+        f"USING gin ((UPPER(full_name::text)) gin_trgm_ops)"
+    )
+
+
+def drop_full_name_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0011_order_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_full_name_trgm_index, drop_full_name_trgm_index),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['owner', 'status', '-created_at'], name='order_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(django.db.models.functions.text.Upper('phone'), name='order_phone_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='order_email_upper_idx'),
+        ),
+    ]
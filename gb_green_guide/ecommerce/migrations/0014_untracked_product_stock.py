@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def untrack_zero_stock(apps, schema_editor):
+    # stock pehle enforce nahi hota tha - 0 + available = seller ne stock kabhi set nahi kiya
+    Product = apps.get_model('ecommerce', 'Product')
+    Product.objects.filter(stock=0, is_available=True).update(stock=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0013_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(untrack_zero_stock, migrations.RunPython.noop),
+    ]
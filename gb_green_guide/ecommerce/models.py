@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.functions import Upper
 from django.utils.text import slugify
 from core.models import City   # tumhare existing City model ka import
 
@@ -55,10 +56,11 @@ class Product(models.Model):
 
     price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     discount_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
-    stock = models.PositiveIntegerField(default=0, blank=True, null=True)
+    stock = models.PositiveIntegerField(default=None, blank=True, null=True)  # NULL = stock track nahi hota (ecommerce/stock.py)
 
     is_available = models.BooleanField(default=True)
     image = models.ImageField(upload_to="uploads/products/", blank=True, null=True)
+    image_variants = models.JSONField(null=True, blank=True, editable=False)  # core/derivatives.py
 
     created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
@@ -122,6 +124,12 @@ class CartItem(models.Model):
     )
     quantity = models.PositiveIntegerField(default=1, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            # ek cart mein ek product ki sirf ek line (add_to_cart upsert isi pe chalta hai)
+            models.UniqueConstraint(fields=["cart", "product"], name="unique_cart_product"),
+        ]
+
     def __str__(self):
         return f"{self.product.name if self.product else 'Deleted Product'} x {self.quantity}"
     
@@ -189,6 +197,18 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # ✅ my_orders / seller_orders: filter by user/owner, newest first
+            models.Index(fields=["owner", "-created_at"], name="order_owner_created_idx"),
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+            # ✅ seller order search: status + date range, phone/email exact (case-insensitive)
+            models.Index(fields=["owner", "status", "-created_at"], name="order_owner_status_idx"),
+            models.Index(Upper("phone"), name="order_phone_upper_idx"),
+            models.Index(Upper("email"), name="order_email_upper_idx"),
+            # full_name trigram (GIN) index PostgreSQL-only hai - migration 0012 mein
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username if self.user else 'Guest'}"
 
@@ -242,3 +262,152 @@ class Review(models.Model):
 
     def __str__(self):
         return f"{self.user} → {self.product} ({self.rating}⭐)"
+
+
+# ===============================
+# ✅ "Customers also bought" (offline co-occurrence model)
+# ===============================
+class RelatedProduct(models.Model):
+    """
+    Top-k co-purchased products per product, built by the
+    `build_related_products` management command from OrderItem history.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="related_links",
+    )
+    related = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="related_from",
+    )
+    score = models.PositiveIntegerField(default=0)  # kitne orders mein saath khareeday gaye
+    computed_through = models.DateTimeField()  # is waqt tak ke orders shamil hain
+
+    class Meta:
+        unique_together = ("product", "related")
+        indexes = [
+            models.Index(fields=["product", "-score"], name="relatedproduct_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.related_id} ({self.score})"
+
+
+# ===============================
+# ✅ Trending score (update_trending command maintain karta hai)
+# ===============================
+class ProductTrend(models.Model):
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="trend",
+    )
+    # log2 of decayed score relative to a fixed epoch - see ecommerce/trending.py
+    log_score = models.FloatField(default=0)
+    last_event_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-log_score"], name="producttrend_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"Trend of {self.product_id}: {self.log_score:.2f}"
+
+
+# ===============================
+# ✅ Seller dashboard rollups (ecommerce/analytics.py update karta hai)
+# ===============================
+class SellerDailyStats(models.Model):
+    """Orders and revenue per seller, per day (order date), per status"""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_order_stats",
+    )
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("owner", "date", "status")
+        verbose_name_plural = "Seller daily stats"
+
+    def __str__(self):
+        return f"{self.owner_id} {self.date} {self.status}: {self.orders}"
+
+
+class SellerDailyProductStats(models.Model):
+    """Units sold per seller, per day, per product (cancelled orders excluded)"""
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_product_stats",
+    )
+    date = models.DateField()
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("owner", "date", "product")
+        verbose_name_plural = "Seller daily product stats"
+
+    def __str__(self):
+        return f"{self.owner_id} {self.date} product {self.product_id}: {self.units}"
+
+
+# ===============================
+# ✅ Short-TTL cart stock holds (settings.CART_HOLD_MINUTES)
+# ===============================
+class StockHold(models.Model):
+    """Stock reserved for a cart; released by `release_stock_holds` when expired"""
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name="stock_holds",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_holds",
+    )
+    quantity = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("cart", "product")
+
+    def __str__(self):
+        return f"Hold {self.product_id} x {self.quantity} for cart {self.cart_id}"
+
+
+# ===============================
+# ✅ Idempotency-Key records (retry-safe checkout / cart calls)
+# ===============================
+class IdempotencyKey(models.Model):
+    """First response for a (user, Idempotency-Key) pair, replayed on retries"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)  # same key + different body → rejected
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.status_code or 'in progress'})"
@@ -0,0 +1,115 @@
+# ecommerce/order_status.py
+"""
+Order state machine and batched status transitions.
+
+    Pending   → Confirmed, Cancelled
+    Confirmed → Shipped, Cancelled
+    Shipped   → Delivered, Cancelled
+    Delivered, Cancelled → final
+
+`transition_orders` reads the orders once, then runs one conditional UPDATE
+per target state:
+
+    UPDATE order SET status = 'Shipped', updated_at = <now>
+    WHERE status IN ('Confirmed')
+      AND ((id = 1 AND updated_at = t1) OR (id = 2 AND updated_at = t2) ...)
+
+An order somebody else changed in the meantime (status or updated_at moved)
+does not match and is reported back instead of being overwritten. Stock for
+cancelled orders and the seller rollups are updated in batch as well.
+Callers must run inside transaction.atomic().
+"""
+from collections import defaultdict
+
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .analytics import record_status_changes
+from .models import Order, OrderItem
+from .stock import orders_quantities, release_stock
+
+PENDING = "Pending"
+CONFIRMED = "Confirmed"
+SHIPPED = "Shipped"
+DELIVERED = "Delivered"
+CANCELLED = "Cancelled"
+
+TRANSITIONS = {
+    PENDING: {CONFIRMED, CANCELLED},
+    CONFIRMED: {SHIPPED, CANCELLED},
+    SHIPPED: {DELIVERED, CANCELLED},
+    DELIVERED: set(),
+    CANCELLED: set(),
+}
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status or PENDING, ())
+
+
+def allowed_sources(new_status):
+    return sorted(status for status, targets in TRANSITIONS.items() if new_status in targets)
+
+
+def transition_orders(orders, transitions):
+    """
+    orders: queryset limiting which orders the caller may touch.
+    transitions: iterable of (order_id, new_status, expected_updated_at or None).
+
+    Returns (changed, failed):
+        changed - [(order, old_status)] with items/products prefetched
+        failed  - {order_id: reason}
+    """
+    wanted = {order_id: (new_status, expected) for order_id, new_status, expected in transitions}
+    current = {
+        pk: (status, updated_at)
+        for pk, status, updated_at in orders.filter(pk__in=wanted).values_list("pk", "status", "updated_at")
+    }
+
+    failed = {}
+    groups = defaultdict(list)
+    old_statuses = {}
+    for order_id, (new_status, expected) in wanted.items():
+        if order_id not in current:
+            failed[order_id] = "Order not found"
+            continue
+        old_status, updated_at = current[order_id]
+        if expected is not None and expected != updated_at:
+            failed[order_id] = "Order was modified by someone else, reload and retry"
+            continue
+        if not can_transition(old_status, new_status):
+            failed[order_id] = f"Cannot change status from {old_status} to {new_status}"
+            continue
+        groups[new_status].append((order_id, updated_at))
+        old_statuses[order_id] = old_status or PENDING
+
+    if not groups:
+        return [], failed
+
+    now = timezone.now()
+    for new_status, rows in groups.items():
+        match = Q()
+        for order_id, updated_at in rows:
+            match |= Q(pk=order_id, updated_at=updated_at)
+        orders.filter(match, status__in=allowed_sources(new_status)).update(
+            status=new_status, updated_at=now
+        )
+
+    # ✅ kaun si rows waqai update hui - baaqi kisi aur ne beech mein badal di
+    changed_orders = list(
+        Order.objects.filter(pk__in=old_statuses, updated_at=now)
+        .select_related("user", "owner")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id")))
+        .order_by("pk")
+    )
+    changed_ids = {order.pk for order in changed_orders}
+    for order_id in old_statuses:
+        if order_id not in changed_ids:
+            failed[order_id] = "Order was modified by someone else, reload and retry"
+
+    cancelled = [order.pk for order in changed_orders if order.status == CANCELLED]
+    if cancelled:
+        release_stock(orders_quantities(cancelled))
+    record_status_changes((order, old_statuses[order.pk], order.status) for order in changed_orders)
+
+    return [(order, old_statuses[order.pk]) for order in changed_orders], failed
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import Product, ProductCategory, Cart, CartItem, Order, OrderItem,Review
 from core.models import City
 from core.serializers import CitySerializer 
+from core.images import CachedImageField, SrcsetField
+from core.uploads import SignedUploadField
 
 # ✅ Category Serializer
 class ProductCategorySerializer(serializers.ModelSerializer):
@@ -28,7 +30,10 @@ class ProductSerializer(serializers.ModelSerializer):
 
     discount_percentage = serializers.SerializerMethodField()
     effective_price = serializers.SerializerMethodField()
-    reviews_count = serializers.IntegerField(source="reviews.count", read_only=True)
+    reviews_count = serializers.SerializerMethodField()
+    image = CachedImageField()
+    image_upload = SignedUploadField(kind="products")  # direct upload result (core/uploads.py)
+    srcset = SrcsetField()
 
     class Meta:
         model = Product
@@ -36,7 +41,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "id", "owner", "city", "city_id", "category", "category_id",
             "name", "slug", "description",
             "price", "discount_price", "effective_price", "discount_percentage",
-            "stock", "is_available", "image",
+            "stock", "is_available", "image", "srcset", "image_upload",
             "created_at", "reviews_count","updated_at"
         ]
         read_only_fields = ["slug", "created_at", "updated_at"]
@@ -52,6 +57,13 @@ class ProductSerializer(serializers.ModelSerializer):
     def get_effective_price(self, obj):
         return obj.discount_price if obj.discount_price else obj.price
 
+    def get_reviews_count(self, obj):
+        # ✅ List queries annotate reviews_count, warna ek count query
+        annotated = getattr(obj, "reviews_count", None)
+        if annotated is not None:
+            return annotated
+        return obj.reviews.count()
+
 # ✅ CartItem Serializer
 class CartItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
@@ -81,7 +93,7 @@ class CartSerializer(serializers.ModelSerializer):
 # ✅ OrderItem Serializer
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
-    product_image = serializers.ImageField(source='product.image', read_only=True, allow_null=True)
+    product_image = CachedImageField(source='product.image', read_only=True)
 
     class Meta:
         model = OrderItem
@@ -137,6 +149,14 @@ class OrderSerializer(serializers.ModelSerializer):
         return ", ".join([part for part in address_parts if part])
 
 
+# ✅ Lean order list - same order fields, nested items ki jagah items_count (annotated in the view)
+class OrderListSerializer(OrderSerializer):
+    items_count = serializers.IntegerField(read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = [field for field in OrderSerializer.Meta.fields if field != "items"] + ["items_count"]
+        read_only_fields = fields
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
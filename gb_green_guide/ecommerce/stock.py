@@ -0,0 +1,185 @@
+# ecommerce/stock.py
+"""
+Oversell-proof stock handling.
+
+Stock only ever moves through conditional UPDATE statements:
+
+    UPDATE product SET stock = stock - n WHERE id = ? AND stock >= n
+
+so two checkouts racing for the last unit can never both succeed. A whole
+cart is reserved with one SELECT ... FOR UPDATE (rows locked in ascending id
+order, so concurrent checkouts cannot deadlock) plus one UPDATE using
+CASE id WHEN ... per-product quantities. Callers must run inside
+transaction.atomic() so a partially reserved cart is rolled back.
+
+`stock = NULL` means the seller does not track stock for that product.
+
+Optional cart holds (settings.CART_HOLD_MINUTES > 0) reserve stock while the
+item sits in the cart; the `release_stock_holds` command returns expired
+holds to stock.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from core.stats import schedule_city_stats_refresh
+from .models import CartItem, OrderItem, Product, StockHold
+
+CART_HOLD_MINUTES = getattr(settings, "CART_HOLD_MINUTES", 0)  # 0 = holds disabled
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Not enough stock for products: {self.product_ids}")
+
+
+def _per_product(quantities):
+    """CASE id WHEN .. THEN qty .. END - one statement for many products"""
+    return Case(
+        *[When(pk=product_id, then=Value(qty)) for product_id, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(quantities):
+    """Atomically take {product_id: qty} out of stock, raising OutOfStock if any is short."""
+    wanted = {product_id: qty for product_id, qty in quantities.items() if qty > 0}
+    if not wanted:
+        return
+
+    # Rows lock karo id order mein (har transaction same order → no deadlocks)
+    locked, cities = {}, {}
+    for product_id, stock, city_id in (
+        Product.objects.select_for_update()
+        .filter(pk__in=wanted)
+        .order_by("pk")
+        .values_list("pk", "stock", "city_id")
+    ):
+        locked[product_id], cities[product_id] = stock, city_id
+    short = [
+        product_id for product_id, qty in wanted.items()
+        if product_id not in locked or (locked[product_id] is not None and locked[product_id] < qty)
+    ]
+    if short:
+        raise OutOfStock(short)
+
+    need = _per_product(wanted)
+    updated = Product.objects.filter(
+        Q(stock__isnull=True) | Q(stock__gte=need), pk__in=wanted
+    ).update(
+        stock=F("stock") - need,
+        # last units gone → product automatically unavailable
+        is_available=Case(When(stock=need, then=Value(False)), default=F("is_available")),
+    )
+    if updated != len(wanted):
+        # sirf un backends pe jahan row locks nahi (SQLite) - caller rollback karega
+        raise OutOfStock(list(wanted))
+    # sold out → city ka available products count badla
+    schedule_city_stats_refresh({cities[product_id] for product_id, qty in wanted.items() if locked[product_id] == qty})
+
+
+def release_stock(quantities):
+    """Return {product_id: qty} to stock (cancelled orders, released holds)."""
+    returned = {product_id: qty for product_id, qty in quantities.items() if qty > 0}
+    if not returned:
+        return
+    products = Product.objects.filter(pk__in=sorted(returned), stock__isnull=False)
+    # sold out products dobara available honge → unki cities refresh
+    schedule_city_stats_refresh(set(products.filter(stock=0, is_available=False).values_list("city_id", flat=True)))
+    products.update(
+        stock=F("stock") + _per_product(returned),
+        # sold out tha → dobara available
+        is_available=Case(When(stock=0, then=Value(True)), default=F("is_available")),
+    )
+
+
+def order_quantities(order):
+    return dict(
+        order.items.filter(product__isnull=False)
+        .values("product_id")
+        .annotate(qty=Sum("quantity"))
+        .values_list("product_id", "qty")
+    )
+
+
+def orders_quantities(order_ids):
+    """{product_id: qty} summed over many orders - one query."""
+    return dict(
+        OrderItem.objects.filter(order_id__in=order_ids, product__isnull=False)
+        .values("product_id")
+        .annotate(qty=Sum("quantity"))
+        .values_list("product_id", "qty")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cart holds
+# ---------------------------------------------------------------------------
+def sync_holds(cart, product_ids):
+    """
+    Make the cart's holds for `product_ids` match the cart quantities,
+    reserving or releasing the difference. No-op when holds are disabled.
+    """
+    if CART_HOLD_MINUTES <= 0:
+        return
+    product_ids = {int(pid) for pid in product_ids if pid not in (None, "")}
+    if not product_ids:
+        return
+    wanted = dict(
+        CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+        .values("product_id")
+        .annotate(qty=Sum("quantity"))
+        .values_list("product_id", "qty")
+    )
+    holds = {
+        hold.product_id: hold
+        for hold in StockHold.objects.select_for_update().filter(cart=cart, product_id__in=product_ids)
+    }
+
+    to_reserve, to_release = {}, {}
+    for product_id in product_ids:
+        want = wanted.get(product_id) or 0
+        have = holds[product_id].quantity if product_id in holds else 0
+        if want > have:
+            to_reserve[product_id] = want - have
+        elif want < have:
+            to_release[product_id] = have - want
+    reserve_stock(to_reserve)
+    release_stock(to_release)
+
+    expires_at = timezone.now() + timedelta(minutes=CART_HOLD_MINUTES)
+    StockHold.objects.filter(
+        cart=cart, product_id__in=[pid for pid in product_ids if not wanted.get(pid)]
+    ).delete()
+    StockHold.objects.bulk_create(
+        [
+            StockHold(cart=cart, product_id=pid, quantity=qty, expires_at=expires_at)
+            for pid, qty in wanted.items()
+            if qty
+        ],
+        update_conflicts=True,
+        unique_fields=["cart", "product"],
+        update_fields=["quantity", "expires_at"],
+    )
+
+
+def consume_holds(cart):
+    """Checkout: take over the cart's held quantities ({product_id: qty}) and drop the holds."""
+    holds = StockHold.objects.select_for_update().filter(cart=cart)
+    held = dict(holds.values_list("product_id", "quantity"))
+    if held:
+        holds.delete()
+    return held
+
+
+def reserve_for_checkout(cart, quantities):
+    """
+    Reserve {product_id: qty} for an order, counting stock the cart already
+    holds. Surplus holds go back to stock.
+    """
+    held = consume_holds(cart)
+    reserve_stock({pid: qty - held.get(pid, 0) for pid, qty in quantities.items()})
+    release_stock({pid: qty - quantities.get(pid, 0) for pid, qty in held.items()})
@@ -1,3 +1,375 @@
-from django.test import TestCase
+import csv
+import threading
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import City, CityStats, Region
+from .exports import _cell
+from .models import Cart, CartItem, Order, OrderItem, Product
+
+User = get_user_model()
+
+CHECKOUT_DATA = {
+    "full_name": "Test Buyer",
+    "email": "buyer@example.com",
+    "phone": "03001234567",
+    "address_line1": "Main Bazaar",
+    "city": "Gilgit",
+}
+
+
+def make_seller(username):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", role="business_owner"
+    )
+
+
+def make_product(owner, city=None, stock=10, price="100.00", **extra):
+    extra.setdefault("name", f"{owner.username} product {Product.objects.count()}")
+    return Product.objects.create(owner=owner, city=city, price=Decimal(price), stock=stock, **extra)
+
+
+def run_in_parallel(calls):
+    """Run callables at the same moment on their own threads (own DB connections), return results in order."""
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def worker(index, call):
+        try:
+            barrier.wait()
+            results[index] = call()
+        except Exception as e:  # test mein assert hoga
+            results[index] = e
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@skipUnlessDBFeature("has_select_for_update")  # SQLite pe parallel writers "table is locked" dete hain
+class CheckoutStockRaceTests(TransactionTestCase):
+    """Two buyers checking out the last unit at the same time (ecommerce/stock.py)"""
+
+    def setUp(self):
+        city = City.objects.create(name="Gilgit", region=Region.objects.create(name="Gilgit Division"))
+        self.product = make_product(make_seller("seller"), city=city, stock=1)
+        self.buyers = []
+        for name in ("buyer1", "buyer2"):
+            buyer = User.objects.create_user(username=name)
+            cart = Cart.objects.create(user=buyer)
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+            self.buyers.append(buyer)
+
+    def checkout(self, buyer):
+        client = APIClient()
+        client.force_authenticate(buyer)
+        return client.post("/ecommerce/orders/", CHECKOUT_DATA, format="json").status_code
+
+    def test_last_unit_sold_once(self):
+        results = run_in_parallel([lambda buyer=buyer: self.checkout(buyer) for buyer in self.buyers])
+
+        self.assertEqual(sorted(results), [201, 409])
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertFalse(self.product.is_available)
+
+
+class UntrackedStockTests(TestCase):
+    def test_product_without_stock_can_be_bought(self):
+        seller = make_seller("seller")
+        product = Product.objects.create(owner=seller, name="Dried apricots", price=Decimal("500.00"))
+        self.assertIsNone(product.stock)
+        buyer = User.objects.create_user(username="buyer")
+        client = APIClient()
+        client.force_authenticate(buyer)
+
+        response = client.post("/ecommerce/cart/add/", {"product_id": product.id, "quantity": 3}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = client.post("/ecommerce/orders/", CHECKOUT_DATA, format="json")
+        self.assertEqual(response.status_code, 201)
+        product.refresh_from_db()
+        self.assertIsNone(product.stock)
+        self.assertTrue(product.is_available)
+
+
+@skipUnlessDBFeature("has_select_for_update")  # SQLite pe parallel writers "table is locked" dete hain
+class ParallelAddToCartTests(TransactionTestCase):
+    """Quick taps on "add to cart" from several tabs (ecommerce/cart.py upsert)"""
+
+    def setUp(self):
+        self.product = make_product(make_seller("seller"), stock=100)
+        self.buyer = User.objects.create_user(username="buyer")
+
+    def add(self, quantity):
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        return client.post(
+            "/ecommerce/cart/add/", {"product_id": self.product.id, "quantity": quantity}, format="json"
+        ).status_code
+
+    def test_parallel_adds_sum_into_one_line(self):
+        quantities = [1, 2, 3, 4, 5]
+        results = run_in_parallel([lambda qty=qty: self.add(qty) for qty in quantities])
+
+        self.assertEqual(results, [200] * len(quantities))
+        lines = CartItem.objects.filter(cart__user=self.buyer, product=self.product)
+        self.assertEqual(lines.count(), 1)
+        self.assertEqual(lines.get().quantity, sum(quantities))
+
+
+class MultiSellerCheckoutTests(TestCase):
+    """Checkout splits the cart into one order per seller, in a fixed number of queries"""
+
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="buyer")
+        self.cart = Cart.objects.create(user=self.buyer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def fill_cart(self, sellers):
+        sellers = [make_seller(f"seller{i}") for i in range(sellers)]
+        for seller in sellers:
+            for quantity in (1, 2):
+                CartItem.objects.create(cart=self.cart, product=make_product(seller), quantity=quantity)
+        return sellers
+
+    def checkout(self, sellers):
+        sellers = self.fill_cart(sellers)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(15):
+                response = self.client.post("/ecommerce/orders/", CHECKOUT_DATA, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["orders_count"], len(sellers))
+        self.assertEqual(response.data["items_count"], 2 * len(sellers))
+        orders = Order.objects.filter(user=self.buyer)
+        self.assertEqual(sorted(orders.values_list("owner_id", flat=True)), sorted(s.id for s in sellers))
+        for order in orders:
+            self.assertEqual(order.items.count(), 2)
+            self.assertEqual(order.total_price, Decimal("300.00"))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(s.email for s in sellers))
+        self.assertFalse(self.cart.items.exists())
+
+    def test_one_seller(self):
+        self.checkout(1)
+
+    def test_five_sellers(self):
+        self.checkout(5)
+
+    def test_fifty_sellers(self):
+        self.checkout(50)
+
+
+class IdempotentCheckoutEmailTests(TestCase):
+    def test_seller_email_waits_for_commit(self):
+        buyer = User.objects.create_user(username="buyer")
+        cart = Cart.objects.create(user=buyer)
+        CartItem.objects.create(cart=cart, product=make_product(make_seller("seller")), quantity=1)
+        client = APIClient()
+        client.force_authenticate(buyer)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post(
+                "/ecommerce/orders/", CHECKOUT_DATA, format="json", HTTP_IDEMPOTENCY_KEY="checkout-1"
+            )
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(mail.outbox, [])  # abhi transaction open hai
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual([m.to for m in mail.outbox], [["seller@example.com"]])
+
+
+class SellerOrdersQueryTests(TestCase):
+    """seller_orders query count doesn't grow with orders or items"""
+
+    def setUp(self):
+        self.seller = make_seller("seller")
+        self.buyer = User.objects.create_user(username="buyer")
+        self.products = [make_product(self.seller) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def add_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(
+                user=self.buyer, owner=self.seller, full_name="Test Buyer", email="buyer@example.com",
+                phone="03001234567", address_line1="Main Bazaar", city="Gilgit", country="Pakistan",
+                total_price=Decimal("300.00"),
+            )
+            for product in self.products:
+                OrderItem.objects.create(
+                    order=order, product=product, quantity=1, price=product.price, subtotal=product.price
+                )
+
+    def fetch(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_list_query_count(self):
+        self.add_orders(1)
+        self.fetch("/ecommerce/orders/seller_orders/", 2)
+        self.add_orders(9)
+        results = self.fetch("/ecommerce/orders/seller_orders/", 2)
+
+        self.assertEqual(results[0]["items_count"], 3)
+        self.assertNotIn("items", results[0])
+        # list pe bhi contact + address (purane clients inhi pe chalte hain)
+        for field in ("phone", "email", "address_line1", "shipping_address"):
+            self.assertIn(field, results[0])
+
+    def test_expand_items_query_count(self):
+        self.add_orders(1)
+        self.fetch("/ecommerce/orders/seller_orders/?expand=items", 3)
+        self.add_orders(9)
+        results = self.fetch("/ecommerce/orders/seller_orders/?expand=items", 3)
+
+        self.assertEqual(len(results[0]["items"]), 3)
+        self.assertEqual(results[0]["items"][0]["product_name"], self.products[0].name)
+
+
+class SellerExportTests(TestCase):
+    """Streaming CSV exports (ecommerce/exports.py)"""
+
+    def setUp(self):
+        self.seller = make_seller("seller")
+        self.buyer = User.objects.create_user(username="buyer")
+        self.product = make_product(self.seller, name="=HYPERLINK(\"http://evil\")")
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller)
+
+    def add_orders(self, count):
+        orders = Order.objects.bulk_create([
+            Order(user=self.buyer, owner=self.seller, full_name="Test Buyer", phone="+92 300 1234567",
+                  city="Gilgit", total_price=Decimal("100.00"))
+            for _ in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.product, quantity=1, price=Decimal("100.00"), subtotal=Decimal("100.00"))
+            for order in orders
+        ])
+
+    def stream_peak(self):
+        """Consume the export row by row (like a download), return (rows, peak traced bytes)."""
+        response = self.client.get("/ecommerce/orders/seller_orders/export/")
+        tracemalloc.start()
+        try:
+            rows = sum(1 for _ in response.streaming_content)
+            return rows, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_streams_from_iterator(self):
+        self.add_orders(3)
+        with mock.patch.object(QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator) as iterator:
+            with self.assertNumQueries(0):
+                response = self.client.get("/ecommerce/orders/seller_orders/export/")
+            self.assertIsInstance(response, StreamingHttpResponse)
+            self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+            rows = list(csv.reader(line.decode() for line in response.streaming_content))
+        iterator.assert_called_once()
+
+        self.assertEqual(rows[0][:3], ["order_id", "order_date", "status"])
+        self.assertEqual(len(rows), 4)
+        header = rows[0]
+        self.assertEqual(rows[1][header.index("phone")], "+92 300 1234567")
+        self.assertEqual(rows[1][header.index("product_name")], "'=HYPERLINK(\"http://evil\")")
+
+    @mock.patch("ecommerce.exports.EXPORT_CHUNK_SIZE", 100)
+    def test_memory_stays_flat(self):
+        self.add_orders(1000)
+        small_rows, small_peak = self.stream_peak()
+        self.add_orders(9000)
+        large_rows, large_peak = self.stream_peak()
+
+        self.assertEqual((small_rows, large_rows), (1001, 10001))
+        # 10x rows, memory wohi - ek waqt mein sirf ek chunk memory mein
+        self.assertLess(large_peak, small_peak * 1.5)
+
+    def test_cell_formula_guard(self):
+        self.assertEqual(_cell(None), "")
+        self.assertEqual(_cell(Decimal("12.50")), "12.50")
+        self.assertEqual(_cell(date(2025, 1, 31)), "2025-01-31")
+        for value in ("=SUM(A1:A9)", "@cmd", "+cmd|' /C calc'!A0", "-2+3", "\t=1", "\r=1"):
+            self.assertEqual(_cell(value), "'" + value)
+        for value in ("+92 300 1234567", "-15", "0300-1234567", "Hunza apricots"):
+            self.assertEqual(_cell(value), value)
+
+
+class ProductListQueryTests(TestCase):
+    """Nested city (with CityStats counters) and reviews_count come from the list query itself"""
+
+    def setUp(self):
+        self.seller = make_seller("seller")
+        self.region = Region.objects.create(name="Gilgit Division")
+
+    def add_products(self, count):
+        for _ in range(count):
+            city = City.objects.create(name=f"City {City.objects.count()}", region=self.region)
+            CityStats.objects.create(city=city, products=1)
+            make_product(self.seller, city=city)
+
+    def fetch(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_product_list_query_count(self):
+        self.add_products(1)
+        _, few = self.fetch("/ecommerce/products/")
+        self.add_products(9)
+        response, many = self.fetch("/ecommerce/products/")
+
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(many, few)
+        self.assertEqual(response.data[0]["city"]["products_count"], 1)
+
+    def test_paged_product_list_query_count(self):
+        self.add_products(1)
+        _, few = self.fetch("/ecommerce/products/?page=1&page_size=10")
+        self.add_products(9)
+        response, many = self.fetch("/ecommerce/products/?page=1&page_size=10")
+
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(many, few)
+
+    def test_cart_query_count(self):
+        buyer = User.objects.create_user(username="buyer")
+        Cart.objects.create(user=buyer)
+        client = APIClient()
+        client.force_authenticate(buyer)
+
+        def add_all():
+            operations = [{"product_id": product.id, "quantity": 1} for product in Product.objects.all()]
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post("/ecommerce/cart/bulk/", {"operations": operations}, format="json")
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries)
+
+        self.add_products(1)
+        _, few = add_all()
+        self.add_products(9)
+        response, many = add_all()
+
+        self.assertEqual(len(response.data["items"]), 10)
+        self.assertEqual(many, few)
@@ -0,0 +1,47 @@
+# ecommerce/trending.py
+"""
+Time-decayed trending scores.
+
+Every event (order item, review) contributes weight * 2^(-age / half_life).
+Instead of decaying every stored score on each run, scores are kept in log2
+space relative to a fixed epoch:
+
+    log_score = log2(sum(weight * 2^((event_time - EPOCH) / half_life)))
+
+Decay then shifts all scores by the same amount, so ranking by log_score is
+always correct and a run only has to touch products/cities with new events.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+TRENDING_HALF_LIFE_HOURS = getattr(settings, "TRENDING_HALF_LIFE_HOURS", 72)
+ORDER_ITEM_WEIGHT = 3.0
+REVIEW_WEIGHT = 1.0
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_exponent(when):
+    """Number of half-lives between EPOCH and `when`."""
+    return (when - EPOCH).total_seconds() / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def event_log_score(weight, when):
+    return math.log2(weight) + decay_exponent(when)
+
+
+def log_add(a, b):
+    """log2(2^a + 2^b) without overflow; None means 'no score yet'."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def current_score(log_score, now):
+    """Decayed score as of `now` (for display only - ranking uses log_score)."""
+    return 2 ** (log_score - decay_exponent(now))
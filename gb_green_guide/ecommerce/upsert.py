@@ -0,0 +1,37 @@
+# ecommerce/upsert.py
+"""
+Multi-row "insert or add to" statements:
+
+    INSERT INTO t (keys..., values...) VALUES (...), (...)
+    ON CONFLICT (keys...) DO UPDATE SET v = t.v + EXCLUDED.v
+
+Needs a unique constraint on the key columns. Works on PostgreSQL and
+SQLite (3.24+, RETURNING needs 3.35+).
+"""
+from django.db import connection
+
+
+def increment_upsert(model, key_fields, value_fields, rows, returning=None):
+    """
+    rows: iterable of tuples ordered as key_fields + value_fields (column names).
+    Returns the fetched RETURNING rows when `returning` columns are given.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [*key_fields, *value_fields]
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(c) for c in columns)}) "
+        f"VALUES {', '.join([row_placeholder] * len(rows))} "
+        f"ON CONFLICT ({', '.join(quote(c) for c in key_fields)}) DO UPDATE SET "
+        + ", ".join(f"{quote(c)} = {table}.{quote(c)} + EXCLUDED.{quote(c)}" for c in value_fields)
+    )
+    if returning:
+        sql += f" RETURNING {', '.join(quote(c) for c in returning)}"
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if returning else []
@@ -6,14 +6,44 @@ from django_filters import rest_framework as django_filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Product, ProductCategory, Cart, CartItem, Order, OrderItem,Review
-from .serializers import ProductSerializer, ProductCategorySerializer, CartSerializer, CartItemSerializer, OrderSerializer,ReviewSerializer
+from .models import Product, ProductCategory, Cart, CartItem, Order, OrderItem,Review, SellerDailyStats, SellerDailyProductStats
+from .serializers import ProductSerializer, ProductCategorySerializer, CartSerializer, CartItemSerializer, OrderSerializer, OrderListSerializer, ReviewSerializer
 from Business.permissions import IsOwnerOrReadOnly, IsBusinessOwner
-from django.db.models import F, ExpressionWrapper, DecimalField
+from .analytics import record_order_deleted, record_orders_created
+from .order_status import CANCELLED, CONFIRMED, TRANSITIONS, can_transition, transition_orders
+from .idempotency import idempotent
+from .exports import order_items_csv, products_csv
+from .importer import PRODUCT_IMPORT_MAX_ROWS, ImportFormatError, guess_format, import_products, read_rows
+from .cart import decrement_item, fold_operations, increment_items, load_cart, set_items
+from .stock import (
+    CART_HOLD_MINUTES, OutOfStock, order_quantities,
+    release_stock, reserve_for_checkout, sync_holds,
+)
+from django.db import transaction
+from collections import Counter, defaultdict
+from django.db.models import F, ExpressionWrapper, DecimalField, Count, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, time, timedelta
 
 # 📩 Email
-from django.core.mail import send_mail
+from django.core.mail import send_mail, send_mass_mail
 from django.conf import settings
+from django.core.cache import cache
+import csv
+import hashlib
+
+
+# 🔹 Price buckets for storefront facets (Rs.) - last bucket is open ended
+PRICE_BUCKETS = [
+    (0, 500),
+    (500, 1000),
+    (1000, 2500),
+    (2500, 5000),
+    (5000, None),
+]
+PRODUCT_FACETS_CACHE_TTL = getattr(settings, "PRODUCT_FACETS_CACHE_TTL", 60)  # seconds
 
 
 # 🔹 Product Filters
@@ -36,6 +66,29 @@ class ProductFilter(django_filters.FilterSet):
         return queryset.filter(discount_percent__gte=value)
 
 
+# 🔹 Order Filters (seller_orders / my_orders search)
+class OrderFilter(django_filters.FilterSet):
+    created_from = django_filters.DateFilter(method="filter_created_from")
+    created_to = django_filters.DateFilter(method="filter_created_to")
+    full_name = django_filters.CharFilter(field_name="full_name", lookup_expr="icontains")
+    phone = django_filters.CharFilter(field_name="phone", lookup_expr="iexact")
+    email = django_filters.CharFilter(field_name="email", lookup_expr="iexact")
+
+    class Meta:
+        model = Order
+        fields = ["status"]
+
+    # ✅ created_at__date index use nahi karta - din ki boundaries (local time) se range banao
+    def _day_start(self, day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def filter_created_from(self, queryset, name, value):
+        return queryset.filter(created_at__gte=self._day_start(value))
+
+    def filter_created_to(self, queryset, name, value):
+        return queryset.filter(created_at__lt=self._day_start(value + timedelta(days=1)))
+
+
 # 🔹 Category CRUD
 class ProductCategoryViewSet(viewsets.ModelViewSet):
     queryset = ProductCategory.objects.all().order_by("name")
@@ -56,13 +109,23 @@ class ProductViewSet(viewsets.ModelViewSet):
     filterset_class = ProductFilter
     ordering_fields = ["created_at", "price", "discount_price"]
     ordering = ["-created_at"]
+
+    def get_queryset(self):
+        # ✅ serializer owner/category/city(region + stats counters) nest karta hai - ek hi join mein lao
+        queryset = Product.objects.select_related(
+            "owner", "category", "city__region", "city__stats"
+        ).order_by("-created_at")
+        if self.action in ("list", "my_products"):
+            # reviews_count bhi isi query mein (facets/related/trending khud annotate karte hain)
+            queryset = queryset.annotate(reviews_count=Count("reviews", distinct=True))
+        return queryset
     
     def get_permissions(self):
-        if self.action == "create":
+        if self.action in ["create", "bulk_import"]:
             return [IsBusinessOwner()]
         if self.action in ["update", "partial_update", "destroy"]:
             return [IsAuthenticated(), IsOwnerOrReadOnly()]
-        if self.action == "my_products":
+        if self.action in ["my_products", "export_my_products"]:
             return [IsAuthenticated()]
         return super().get_permissions()
     
@@ -137,6 +200,166 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(qs, many=True)
         return Response(serializer.data)
+
+    # ✅ Bulk import: CSV/JSON file (multipart "file") ya JSON body {"products": [...]}
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        ?dry_run=true - sirf validate karo, kuch save nahi
+        ?skip_invalid=true - galat rows chhod ke baaqi save karo (default: sab ya kuch nahi)
+        """
+        dry_run = request.query_params.get("dry_run") == "true"
+        skip_invalid = request.query_params.get("skip_invalid") == "true"
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                rows = read_rows(upload, request.data.get("format") or guess_format(upload.name))
+            else:
+                rows = request.data.get("products")
+                if not isinstance(rows, list):
+                    return Response(
+                        {"detail": "Send a CSV/JSON file as 'file' or a JSON body {\"products\": [...]}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            report = import_products(
+                request.user, rows,
+                dry_run=dry_run, skip_invalid=skip_invalid, max_rows=PRODUCT_IMPORT_MAX_ROWS,
+            )
+        except (ImportFormatError, ValueError, csv.Error) as e:
+            return Response({"detail": f"Could not read import file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        print(f"📦 Product import by {request.user}: {report['created']} created, {len(report['errors'])} rows with errors")
+        if report["errors"] and not report["created"] and not dry_run:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK)
+
+    # ✅ Seller spreadsheet export - CSV stream, memory flat
+    @action(detail=False, methods=["get"], url_path="my_products/export")
+    def export_my_products(self, request):
+        return products_csv(request.user)
+
+    # ✅ Storefront: filtered page + facet counts in one round trip
+    @action(detail=False, methods=["get"], url_path="facets")
+    def facets(self, request):
+        """
+        Same filters/search as the product list (ProductFilter), returns the paginated
+        results plus category, city, price-bucket and availability counts.
+        Counts come from grouped aggregates, so query count is fixed (not per product).
+        Cached for PRODUCT_FACETS_CACHE_TTL seconds per normalized filter set.
+        """
+        cache_key = self._facets_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(
+            queryset.annotate(reviews_count=Count("reviews", distinct=True))
+        )
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data["facets"] = self._facet_counts(queryset)
+
+        cache.set(cache_key, response.data, PRODUCT_FACETS_CACHE_TTL)
+        return response
+
+    # ✅ "Customers also bought" - reads precomputed RelatedProduct rows (top-k)
+    @action(detail=True, methods=["get"], url_path="related")
+    def related(self, request, pk=None):
+        """
+        Products most often bought together with this one.
+        Served from the RelatedProduct table (see build_related_products command),
+        ?limit=N (default 10, max 50).
+        """
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except (TypeError, ValueError):
+            limit = 10
+
+        products = (
+            self.get_queryset()
+            .filter(related_from__product_id=pk, is_available=True)
+            .annotate(reviews_count=Count("reviews", distinct=True))
+            .order_by("-related_from__score", "id")[:limit]
+        )
+        serializer = self.get_serializer(products, many=True)
+        return Response(serializer.data)
+
+    # ✅ Home page: trending products (precomputed by update_trending command)
+    @action(detail=False, methods=["get"], url_path="trending")
+    def trending(self, request):
+        """Top products by time-decayed order/review activity, ?limit=N (default 10, max 50)"""
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except (TypeError, ValueError):
+            limit = 10
+
+        products = (
+            self.get_queryset()
+            .filter(trend__isnull=False, is_available=True)
+            .annotate(reviews_count=Count("reviews", distinct=True))
+            .order_by("-trend__log_score", "id")[:limit]
+        )
+        serializer = self.get_serializer(products, many=True)
+        return Response(serializer.data)
+
+    def _facets_cache_key(self, request):
+        """Same filters in any order / repetition → same cache key"""
+        params = sorted(
+            (key, sorted(request.query_params.getlist(key)))
+            for key in request.query_params
+        )
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        return f"ecommerce:product-facets:{digest}"
+
+    def _facet_counts(self, queryset):
+        # GROUP BY ke liye ordering/select_related hata do
+        facet_qs = queryset.order_by().select_related(None)
+
+        categories = (
+            facet_qs.filter(category__isnull=False)
+            .values("category_id", "category__name")
+            .annotate(count=Count("id"))
+            .order_by("category__name")
+        )
+        cities = (
+            facet_qs.filter(city__isnull=False)
+            .values("city_id", "city__name")
+            .annotate(count=Count("id"))
+            .order_by("city__name")
+        )
+
+        # Price buckets + availability → single aggregate with FILTER clauses
+        aggregates = {
+            "available": Count("id", filter=Q(is_available=True)),
+            "unavailable": Count("id", filter=Q(is_available=False)),
+        }
+        for index, (low, high) in enumerate(PRICE_BUCKETS):
+            condition = Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            aggregates[f"price_{index}"] = Count("id", filter=condition)
+        totals = facet_qs.aggregate(**aggregates)
+
+        return {
+            "categories": [
+                {"id": row["category_id"], "name": row["category__name"], "count": row["count"]}
+                for row in categories
+            ],
+            "cities": [
+                {"id": row["city_id"], "name": row["city__name"], "count": row["count"]}
+                for row in cities
+            ],
+            "price_ranges": [
+                {"min": low, "max": high, "count": totals[f"price_{index}"]}
+                for index, (low, high) in enumerate(PRICE_BUCKETS)
+            ],
+            "availability": {
+                "available": totals["available"],
+                "unavailable": totals["unavailable"],
+            },
+        }
     
     
 
@@ -213,57 +436,216 @@ class CartViewSet(viewsets.ModelViewSet):
     #     serializer.save(user=self.request.user)
 
     @action(detail=False, methods=["post"], url_path="add")
+    @idempotent("cart-add")
     def add_to_cart(self, request):
         product_id = request.data.get("product_id")
-        quantity = int(request.data.get("quantity", 1))
+        try:
+            quantity = int(request.data.get("quantity", 1))
+        except (TypeError, ValueError):
+            quantity = 0
+        if quantity < 1:
+            return Response({"detail": "Quantity must be a positive number"}, status=status.HTTP_400_BAD_REQUEST)
 
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        item, created = CartItem.objects.get_or_create(cart=cart, product_id=product_id)
-        if not created:
-            item.quantity += quantity
-        else:
-            item.quantity = quantity
-        item.save()
+        product = Product.objects.filter(pk=product_id).only("id", "stock", "is_available").first()
+        if not product or not product.is_available:
+            return Response({"detail": "Product is not available"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                cart, _ = Cart.objects.get_or_create(user=request.user)
+                # ✅ Single-statement upsert: quantity = quantity + n (no lost taps)
+                new_quantity = increment_items(cart.id, {product.id: quantity})[product.id]
+
+                # ✅ Stock check - holds on ho to stock reserve, warna sirf soft check
+                if CART_HOLD_MINUTES > 0:
+                    sync_holds(cart, [product.id])
+                elif product.stock is not None and new_quantity > product.stock:
+                    raise OutOfStock([product.id])
+        except OutOfStock:
+            return Response(
+                {"detail": "Not enough stock for this product", "available": product.stock},
+                status=status.HTTP_409_CONFLICT
+            )
 
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        return Response(CartSerializer(load_cart(cart.id)).data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"], url_path="remove")
     def remove_from_cart(self, request):
+        """Remove a product from the cart, or only ?quantity=N units of it"""
         product_id = request.data.get("product_id")
         cart = Cart.objects.filter(user=request.user).first()
         if not cart:
             return Response({"detail": "Cart not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        CartItem.objects.filter(cart=cart, product_id=product_id).delete()
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        quantity = request.data.get("quantity")
+        try:
+            quantity = int(quantity) if quantity not in (None, "") else None
+        except (TypeError, ValueError):
+            return Response({"detail": "Quantity must be a positive number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if quantity is None:
+                CartItem.objects.filter(cart=cart, product_id=product_id).delete()
+            elif quantity > 0:
+                decrement_item(cart.id, product_id, quantity)
+            sync_holds(cart, [product_id])
+        return Response(CartSerializer(load_cart(cart.id)).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    @idempotent("cart-bulk")
+    def bulk(self, request):
+        """
+        Sync many cart lines in one request:
+            {"operations": [{"product_id": 1, "quantity": 2, "op": "add"}, ...]}
+        op = "add" (default, quantity >= 1), "set" (quantity >= 0, 0 removes) or "remove".
+        All ops are validated first, then applied in one transaction.
+        """
+        operations = request.data.get("operations") if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({"detail": "Provide a non-empty 'operations' list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > 200:
+            return Response({"detail": "At most 200 operations per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        parsed, errors = [], []
+        for index, entry in enumerate(operations):
+            if not isinstance(entry, dict):
+                errors.append({"index": index, "detail": "Operation must be an object"})
+                continue
+            op = entry.get("op", "add")
+            try:
+                product_id = int(entry.get("product_id"))
+                quantity = int(entry.get("quantity", 1 if op == "add" else 0))
+            except (TypeError, ValueError):
+                errors.append({"index": index, "detail": "product_id and quantity must be numbers"})
+                continue
+            if op not in ("add", "set", "remove"):
+                errors.append({"index": index, "detail": "op must be add, set or remove"})
+            elif (op == "add" and quantity < 1) or (op == "set" and quantity < 0):
+                errors.append({"index": index, "detail": "Invalid quantity"})
+            else:
+                parsed.append((product_id, op, quantity))
+
+        # ✅ Saare product ids ek query mein validate
+        products = {
+            product_id: (stock, is_available)
+            for product_id, stock, is_available in Product.objects.filter(
+                pk__in={product_id for product_id, _, _ in parsed}
+            ).values_list("id", "stock", "is_available")
+        }
+        invalid = {}
+        for product_id, op, _ in parsed:
+            if product_id not in products:
+                invalid[product_id] = "Product not found"
+            elif op != "remove" and not products[product_id][1]:
+                invalid[product_id] = "Product is not available"
+        errors.extend({"product_id": product_id, "detail": detail} for product_id, detail in invalid.items())
+        if errors:
+            return Response({"detail": "Invalid operations", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        folded = fold_operations(parsed)
+        try:
+            with transaction.atomic():
+                cart, _ = Cart.objects.get_or_create(user=request.user)
+                if folded["remove"]:
+                    CartItem.objects.filter(cart=cart, product_id__in=folded["remove"]).delete()
+                if folded["set"]:
+                    set_items(cart.id, folded["set"])
+                final_quantities = dict(folded["set"])
+                final_quantities.update(increment_items(cart.id, folded["add"]))
+
+                if CART_HOLD_MINUTES > 0:
+                    sync_holds(cart, set(final_quantities) | folded["remove"])
+                else:
+                    short = [
+                        product_id for product_id, qty in final_quantities.items()
+                        if products[product_id][0] is not None and qty > products[product_id][0]
+                    ]
+                    if short:
+                        raise OutOfStock(short)
+        except OutOfStock as e:
+            return Response(
+                {
+                    "detail": "Not enough stock",
+                    "errors": [
+                        {"product_id": product_id, "available": products[product_id][0]}
+                        for product_id in e.product_ids
+                    ],
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(CartSerializer(load_cart(cart.id)).data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"], url_path="clear")
     def clear_cart(self, request):
         cart = Cart.objects.filter(user=request.user).first()
         if cart:
-            cart.items.all().delete()
+            with transaction.atomic():
+                product_ids = list(cart.items.values_list("product_id", flat=True))
+                cart.items.all().delete()
+                sync_holds(cart, product_ids)
         return Response({"detail": "Cart cleared"}, status=status.HTTP_200_OK)
 
 
+BULK_STATUS_MAX_ORDERS = 500
+
+# ✅ Order actions jo lean OrderListSerializer use karti hain
+ORDER_LIST_ACTIONS = ("list", "my_orders", "seller_orders")
+
 
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    filterset_class = OrderFilter
+    # full_name → trigram index, phone/email → UPPER(...) B-tree indexes
+    search_fields = ["full_name", "=phone", "=email"]
 
     def get_queryset(self):
         user = self.request.user
         # Use Q objects instead of union to avoid get_object issues
         from django.db.models import Q
-        return Order.objects.filter(
+        orders = Order.objects.filter(
             Q(user=user) | Q(owner=user)
         ).order_by("-created_at")
+        return self._with_relations(orders)
+
+    def _expand_items(self):
+        return self.request.query_params.get("expand") == "items"
+
+    def _with_relations(self, orders):
+        """
+        List actions: buyer/seller names + items_count, no items (?expand=items for full items).
+        Detail: items + products prefetched in one extra query.
+        """
+        orders = orders.select_related("user", "owner")
+        if self.action in ORDER_LIST_ACTIONS and not self._expand_items():
+            items_count = (
+                OrderItem.objects.filter(order=OuterRef("pk"))
+                .values("order").annotate(c=Count("id")).values("c")
+            )
+            return orders.annotate(items_count=Coalesce(Subquery(items_count), 0))
+        return orders.prefetch_related(
+            Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id"))
+        )
+
+    def get_serializer_class(self):
+        if self.action in ORDER_LIST_ACTIONS and not self._expand_items():
+            return OrderListSerializer
+        return OrderSerializer
     
+    @idempotent("orders-create")
     def create(self, request, *args, **kwargs):
-        """Override create method to handle order creation with proper response"""
+        """
+        Checkout: cart ke items ko seller (product.owner) ke hisaab se group karke
+        har seller ka alag Order banata hai - stock, orders, items sab ek transaction mein.
+        Query count sellers/items pe depend nahi karta (bulk_create + batched updates).
+        """
         try:
-            # Check if cart exists and has items
+            # Check if cart exists and has items (products + sellers ek hi query mein)
             cart = Cart.objects.filter(user=request.user).first()
-            if not cart or cart.items.count() == 0:
+            cart_items = list(cart.items.select_related("product__owner").order_by("id")) if cart else []
+            if not cart_items:
                 return Response(
                     {
                         "error": True,
@@ -273,9 +655,8 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Get seller from first item
-            first_item = cart.items.first()
-            if not first_item or not first_item.product or not first_item.product.owner:
+            # Every item needs a product with a seller
+            if any(not item.product or not item.product.owner for item in cart_items):
                 return Response(
                     {
                         "error": True,
@@ -284,11 +665,6 @@ class OrderViewSet(viewsets.ModelViewSet):
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            seller = first_item.product.owner
-            
-            # Calculate total
-            total_amount = cart.grand_total
 
             # Extract customer details from request
             full_name = request.data.get("full_name")
@@ -319,52 +695,124 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Create order
-            order = Order.objects.create(
-                user=request.user,  # Buyer
-                owner=seller,       # Seller/Product Owner
-                full_name=full_name.strip(),
-                email=email.strip().lower(),
-                phone=phone.strip(),
-                address_line1=address_line1.strip(),
-                address_line2=address_line2.strip() if address_line2 else "",
-                city=city.strip(),
-                country=country.strip(),
-                payment_method="COD",
-                status="Pending",
-                total_price=total_amount
-            )
+            # ✅ Group cart items by seller
+            items_by_seller = defaultdict(list)
+            quantities = Counter()
+            for item in cart_items:
+                items_by_seller[item.product.owner_id].append(item)
+                quantities[item.product_id] += item.quantity
 
-            # Create order items
-            order_items_created = 0
-            for item in cart.items.all():
-                if item.product:  # Ensure product exists
-                    effective_price = item.product.discount_price or item.product.price
-                    OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=effective_price,
-                        subtotal=effective_price * item.quantity
+            try:
+                with transaction.atomic():
+                    # ✅ Stock pehle reserve - kam ho to poora checkout rollback
+                    reserve_for_checkout(cart, quantities)
+
+                    # One order per seller
+                    orders = Order.objects.bulk_create([
+                        Order(
+                            user=request.user,  # Buyer
+                            owner=items[0].product.owner,  # Seller/Product Owner
+                            full_name=full_name.strip(),
+                            email=email.strip().lower(),
+                            phone=phone.strip(),
+                            address_line1=address_line1.strip(),
+                            address_line2=address_line2.strip() if address_line2 else "",
+                            city=city.strip(),
+                            country=country.strip(),
+                            payment_method="COD",
+                            status="Pending",
+                            total_price=sum(item.total_price for item in items),
+                        )
+                        for items in items_by_seller.values()
+                    ])
+
+                    # Order items for all sellers in one insert
+                    order_items = {}
+                    for order, items in zip(orders, items_by_seller.values()):
+                        order_items[order.id] = []
+                        for item in items:
+                            effective_price = item.product.discount_price or item.product.price
+                            order_items[order.id].append(OrderItem(
+                                order=order,
+                                product=item.product,
+                                quantity=item.quantity,
+                                price=effective_price,
+                                subtotal=effective_price * item.quantity
+                            ))
+                    OrderItem.objects.bulk_create(
+                        [item for items in order_items.values() for item in items]
                     )
-                    order_items_created += 1
+                    order_items_created = sum(len(items) for items in order_items.values())
 
-            # Clear cart after successful order creation
-            cart.items.all().delete()
+                    # 📊 Seller dashboard rollups
+                    record_orders_created((order, order_items[order.id]) for order in orders)
 
-            # Send email to seller (product owner)
-            email_sent = False
-            try:
-                if seller.email:
-                    subject = f"New Order Received - GB Green Guide #{order.id}"
-                    message = f"""
+                    # Clear cart after successful order creation
+                    cart.items.all().delete()
+            except OutOfStock as e:
+                names = Product.objects.filter(pk__in=e.product_ids).values_list("name", flat=True)
+                return Response(
+                    {
+                        "error": True,
+                        "message": "Out of stock",
+                        "detail": f"Not enough stock for: {', '.join(name or '-' for name in names)}"
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # 📩 Sellers ko emails - ek batch, ek SMTP connection, commit ke baad
+            email_sent = self._notify_sellers(request.user, orders, order_items)
+
+            # Return success response with order data
+            orders_data = OrderSerializer(
+                Order.objects.filter(pk__in=[order.id for order in orders])
+                .select_related("user", "owner")
+                .prefetch_related("items__product")
+                .order_by("id"),
+                many=True
+            ).data
+            
+            return Response({
+                "error": False,
+                "message": "Order placed successfully!",
+                "data": orders_data[0],  # pehla order (purane clients ke liye)
+                "orders": orders_data,
+                "orders_count": len(orders_data),
+                "email_sent": email_sent,
+                "items_count": order_items_created
+            }, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            print(f"Order creation error: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return Response({
+                "error": True,
+                "message": "Failed to create order",
+                "detail": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _notify_sellers(self, buyer, orders, order_items):
+        """
+        New-order email to every seller in the checkout, sent with one send_mass_mail call.
+        Sent on commit - an Idempotency-Key checkout runs inside the key's transaction
+        (ecommerce/idempotency.py), and a rolled back order must not email anyone.
+        Returns True when emails were queued.
+        """
+        messages = []
+        for order in orders:
+            seller = order.owner
+            if not seller.email:
+                continue
+            subject = f"New Order Received - GB Green Guide #{order.id}"
+            message = f"""
 Dear {seller.first_name or seller.username},
 
 You have received a new order!
 
 Order Details:
 - Order ID: #{order.id}
-- Customer: {request.user.first_name or request.user.username}
+- Customer: {buyer.first_name or buyer.username}
 - Customer Name: {order.full_name}
 - Total Amount: Rs. {order.total_price}
 - Customer Phone: {order.phone}
@@ -377,48 +825,31 @@ Shipping Address:
 
 Items Ordered:
 """
-                    # Add order items to email
-                    for item in order.items.all():
-                        message += f"- {item.product.name} x {item.quantity} = Rs. {item.subtotal}\n"
-                    
-                    message += f"""
+            # Add order items to email
+            for item in order_items[order.id]:
+                message += f"- {item.product.name} x {item.quantity} = Rs. {item.subtotal}\n"
+
+            message += f"""
 Please contact the customer to confirm and arrange delivery.
 
 Best regards,
 GB Green Guide Team
-                    """
-                    send_mail(
-                        subject, 
-                        message, 
-                        settings.DEFAULT_FROM_EMAIL, 
-                        [seller.email],
-                        fail_silently=True
-                    )
-                    email_sent = True
-                    print(f"Order notification email sent to {seller.email}")
-            except Exception as e:
-                print(f"Failed to send order notification email: {e}")
+            """
+            messages.append((subject, message, settings.DEFAULT_FROM_EMAIL, [seller.email]))
 
-            # Return success response with order data
-            order_data = OrderSerializer(order).data
-            
-            return Response({
-                "error": False,
-                "message": "Order placed successfully!",
-                "data": order_data,
-                "email_sent": email_sent,
-                "items_count": order_items_created
-            }, status=status.HTTP_201_CREATED)
+        if not messages:
+            return False
 
-        except Exception as e:
-            print(f"Order creation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return Response({
-                "error": True,
-                "message": "Failed to create order",
-                "detail": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        def send():
+            try:
+                send_mass_mail(messages, fail_silently=True)
+                print(f"Order notification emails sent to {len(messages)} seller(s)")
+            except Exception as e:
+                print(f"Failed to send order notification emails: {e}")
+
+        # SMTP row locks ke saath nahi - transaction commit hone ke baad
+        transaction.on_commit(send)
+        return True
 
     def destroy(self, request, *args, **kwargs):
         """Override destroy method to handle order deletion"""
@@ -440,7 +871,12 @@ GB Green Guide Team
             # Users can now delete delivered orders to clean their records
             
             order_id = order.id
-            order.delete()
+            with transaction.atomic():
+                # Abhi ship nahi hua → stock wapas
+                if order.status in ["Pending", "Confirmed"]:
+                    release_stock(order_quantities(order))
+                record_order_deleted(order)
+                order.delete()
             
             return Response({
                 "error": False,
@@ -459,6 +895,60 @@ GB Green Guide Team
         # This method is no longer used since we override create()
         pass
 
+    def _buyer_status_email(self, order, new_status):
+        """(subject, message, from, [to]) for the buyer on Confirmed / Cancelled, warna None"""
+        if not order.email:
+            return None
+        if new_status == CONFIRMED:
+            subject = f"Order Confirmed - GB Green Guide #{order.id}"
+            message = f"""
+Dear {order.full_name},
+
+Great news! Your order #{order.id} has been confirmed by the seller!
+
+Order Details:
+- Order ID: #{order.id}
+- Seller: {order.owner.first_name or order.owner.username}
+- Total Amount: Rs. {order.total_price}
+- Payment Method: {order.payment_method}
+- Status: {order.status}
+
+Items Ordered:
+"""
+            # Add order items to email
+            for item in order.items.all():
+                if item.product:
+                    message += f"- {item.product.name} x {item.quantity} = Rs. {item.subtotal}\n"
+
+            message += f"""
+The seller will contact you soon at {order.phone} to arrange delivery.
+
+Thank you for shopping with GB Green Guide!
+
+Best regards,
+GB Green Guide Team
+            """
+        elif new_status == CANCELLED:
+            subject = f"Order Cancelled - GB Green Guide #{order.id}"
+            message = f"""
+Dear {order.full_name},
+
+Your order #{order.id} has been cancelled.
+
+Order Details:
+- Order ID: #{order.id}
+- Total Amount: Rs. {order.total_price}
+- Cancellation Date: {order.updated_at.strftime('%B %d, %Y')}
+
+If you have any questions, please contact us.
+
+Best regards,
+GB Green Guide Team
+            """
+        else:
+            return None
+        return (subject, message, settings.DEFAULT_FROM_EMAIL, [order.email])
+
     @action(detail=True, methods=["post"], url_path="confirm")
     def confirm_order(self, request, pk=None):
         try:
@@ -481,96 +971,52 @@ GB Green Guide Team
             old_status = order.status
             
             # Validate the status
-            valid_statuses = ['Pending', 'Confirmed', 'Shipped', 'Delivered', 'Cancelled']
-            if new_status not in valid_statuses:
+            if new_status not in TRANSITIONS:
                 return Response(
                     {
                         "error": True,
                         "message": "Invalid status",
-                        "detail": f"Status must be one of: {', '.join(valid_statuses)}"
+                        "detail": f"Status must be one of: {', '.join(TRANSITIONS)}"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not can_transition(old_status, new_status):
+                allowed = sorted(TRANSITIONS.get(old_status, ())) or ["none"]
+                return Response(
+                    {
+                        "error": True,
+                        "message": "Invalid status transition",
+                        "detail": f"Cannot change status from {old_status} to {new_status}. Allowed: {', '.join(allowed)}"
                     },
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Update order status
-            order.status = new_status
-            order.save()
+            # Conditional update (status + updated_at match) - stock/rollups bhi saath
+            with transaction.atomic():
+                changed, failed = transition_orders(
+                    Order.objects.filter(owner=request.user), [(order.pk, new_status, None)]
+                )
+            if failed:
+                return Response(
+                    {
+                        "error": True,
+                        "message": "Order was updated by someone else",
+                        "detail": failed[order.pk]
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+            order, old_status = changed[0]
             
             print(f"Order {order.id} status updated from {old_status} to {new_status}")
             
-            # Send confirmation email to buyer ONLY when status changes to "Confirmed"
-            if new_status == "Confirmed" and old_status != "Confirmed":
-                try:
-                    if order.email:
-                        subject = f"Order Confirmed - GB Green Guide #{order.id}"
-                        message = f"""
-Dear {order.full_name},
-
-Great news! Your order #{order.id} has been confirmed by the seller!
-
-Order Details:
-- Order ID: #{order.id}
-- Seller: {order.owner.first_name or order.owner.username}
-- Total Amount: Rs. {order.total_price}
-- Payment Method: {order.payment_method}
-- Status: {order.status}
-
-Items Ordered:
-"""
-                        # Add order items to email
-                        for item in order.items.all():
-                            message += f"- {item.product.name} x {item.quantity} = Rs. {item.subtotal}\n"
-                        
-                        message += f"""
-The seller will contact you soon at {order.phone} to arrange delivery.
-
-Thank you for shopping with GB Green Guide!
-
-Best regards,
-GB Green Guide Team
-                        """
-                        send_mail(
-                            subject,
-                            message,
-                            settings.DEFAULT_FROM_EMAIL,
-                            [order.email],
-                            fail_silently=True
-                        )
-                        print(f"Confirmation email sent to buyer: {order.email}")
-                except Exception as e:
-                    print(f"Failed to send confirmation email to buyer: {e}")
-            
-            # Send cancellation email when order is cancelled
-            if new_status == "Cancelled":
+            # Confirmed / Cancelled pe buyer ko email
+            email = self._buyer_status_email(order, new_status)
+            if email:
                 try:
-                    # Email to buyer
-                    if order.email:
-                        subject = f"Order Cancelled - GB Green Guide #{order.id}"
-                        message = f"""
-Dear {order.full_name},
-
-Your order #{order.id} has been cancelled.
-
-Order Details:
-- Order ID: #{order.id}
-- Total Amount: Rs. {order.total_price}
-- Cancellation Date: {order.updated_at.strftime('%B %d, %Y')}
-
-If you have any questions, please contact us.
-
-Best regards,
-GB Green Guide Team
-                        """
-                        send_mail(
-                            subject,
-                            message,
-                            settings.DEFAULT_FROM_EMAIL,
-                            [order.email],
-                            fail_silently=True
-                        )
-                        print(f"Cancellation email sent to buyer: {order.email}")
+                    send_mail(*email, fail_silently=True)
+                    print(f"Status email sent to buyer: {order.email}")
                 except Exception as e:
-                    print(f"Failed to send cancellation email: {e}")
+                    print(f"Failed to send status email to buyer: {e}")
             
             # Return success response
             return Response({
@@ -615,7 +1061,7 @@ GB Green Guide Team
                 )
             
             # Check if order can be cancelled
-            if order.status in ['Delivered', 'Cancelled']:
+            if not can_transition(order.status, CANCELLED):
                 return Response(
                     {
                         "error": True,
@@ -625,9 +1071,21 @@ GB Green Guide Team
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            old_status = order.status
-            order.status = "Cancelled"
-            order.save()
+            with transaction.atomic():
+                changed, failed = transition_orders(
+                    Order.objects.filter(Q(user=request.user) | Q(owner=request.user)),
+                    [(order.pk, CANCELLED, None)]
+                )
+            if failed:
+                return Response(
+                    {
+                        "error": True,
+                        "message": "Order was updated by someone else",
+                        "detail": failed[order.pk]
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+            order, old_status = changed[0]
             
             # Send cancellation emails to both parties
             try:
@@ -709,10 +1167,94 @@ GB Green Guide Team
                 "detail": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=["post"], url_path="bulk_status")
+    def bulk_status(self, request):
+        """
+        Seller: many status changes in one request.
+        {"status": "Shipped", "orders": [12, {"id": 13, "updated_at": "...", "status": "Delivered"}]}
+        updated_at (optional) = jo client ne dekha tha; match na ho to woh order skip.
+        """
+        default_status = request.data.get("status")
+        entries = request.data.get("orders")
+        if not isinstance(entries, list) or not entries:
+            return Response(
+                {"error": True, "message": "Invalid request", "detail": "orders must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(entries) > BULK_STATUS_MAX_ORDERS:
+            return Response(
+                {"error": True, "message": "Too many orders", "detail": f"At most {BULK_STATUS_MAX_ORDERS} orders per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        transitions, errors = [], []
+        seen = set()
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                entry = {"id": entry}
+            new_status = entry.get("status", default_status)
+            raw_updated_at = entry.get("updated_at")
+            try:
+                order_id = int(entry.get("id"))
+            except (TypeError, ValueError):
+                errors.append({"index": index, "detail": "id must be an integer"})
+                continue
+            if order_id in seen:
+                errors.append({"index": index, "detail": f"Order {order_id} listed twice"})
+                continue
+            seen.add(order_id)
+            if new_status not in TRANSITIONS:
+                errors.append({"index": index, "detail": f"Status must be one of: {', '.join(TRANSITIONS)}"})
+                continue
+            updated_at = parse_datetime(raw_updated_at) if raw_updated_at else None
+            if raw_updated_at and updated_at is None:
+                errors.append({"index": index, "detail": "updated_at must be an ISO datetime"})
+                continue
+            transitions.append((order_id, new_status, updated_at))
+        if errors:
+            return Response(
+                {"error": True, "message": "Invalid orders", "detail": errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                changed, failed = transition_orders(Order.objects.filter(owner=request.user), transitions)
+                # ✅ buyer emails ek send_mass_mail mein, commit ke baad
+                messages = [
+                    email for email in (self._buyer_status_email(order, order.status) for order, _ in changed)
+                    if email
+                ]
+                if messages:
+                    transaction.on_commit(lambda: send_mass_mail(messages, fail_silently=True))
+        except Exception as e:
+            print(f"Bulk status update error: {str(e)}")
+            return Response({
+                "error": True,
+                "message": "Failed to update orders",
+                "detail": str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            "error": False,
+            "message": f"{len(changed)} order(s) updated, {len(failed)} failed",
+            "updated": [
+                {
+                    "id": order.id,
+                    "old_status": old_status,
+                    "status": order.status,
+                    "updated_at": order.updated_at,
+                }
+                for order, old_status in changed
+            ],
+            "failed": [{"id": order_id, "detail": reason} for order_id, reason in sorted(failed.items())],
+            "emails_queued": len(messages),
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["get"], url_path="my_orders")
     def my_orders(self, request):
         """Get orders where current user is the buyer"""
-        orders = Order.objects.filter(user=request.user).order_by("-created_at")
+        orders = self.filter_queryset(self._with_relations(Order.objects.filter(user=request.user).order_by("-created_at")))
         page = self.paginate_queryset(orders)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -723,7 +1265,7 @@ GB Green Guide Team
     @action(detail=False, methods=["get"], url_path="seller_orders")
     def seller_orders(self, request):
         """Get orders for current user's products (excluding cancelled orders)"""
-        orders = Order.objects.filter(owner=request.user).exclude(status="Cancelled").order_by("-created_at")
+        orders = self.filter_queryset(self._with_relations(Order.objects.filter(owner=request.user).exclude(status="Cancelled").order_by("-created_at")))
         page = self.paginate_queryset(orders)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -731,6 +1273,70 @@ GB Green Guide Team
         serializer = self.get_serializer(orders, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"], url_path="seller_orders/export")
+    def export_seller_orders(self, request):
+        """
+        Seller ke orders CSV mein (ek row per item) - COD reconciliation ke liye.
+        Same filters as seller_orders (?status, ?created_from, ?search ...), cancelled bhi shamil.
+        """
+        orders = self.filter_queryset(Order.objects.filter(owner=request.user))
+        return order_items_csv(orders)
+
+    @action(detail=False, methods=["get"], url_path="seller_stats")
+    def seller_stats(self, request):
+        """
+        Seller dashboard: revenue, orders by status, daily series and top products
+        for the last ?days=N days (default 30, max 365).
+        Reads only the daily rollup tables, never Order/OrderItem.
+        """
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 365)
+        except (TypeError, ValueError):
+            days = 30
+
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+
+        by_status = {choice: 0 for choice, _ in Order.STATUS_CHOICES}
+        daily = {}
+        revenue = 0
+        rows = SellerDailyStats.objects.filter(owner=request.user, date__range=(start, end))
+        for row in rows.values_list("date", "status", "orders", "revenue"):
+            day, order_status, orders_count, day_revenue = row
+            by_status[order_status] = by_status.get(order_status, 0) + orders_count
+            point = daily.setdefault(day, {"date": day, "orders": 0, "revenue": 0})
+            point["orders"] += orders_count
+            if order_status != "Cancelled":
+                point["revenue"] += day_revenue
+                revenue += day_revenue
+
+        top_products = (
+            SellerDailyProductStats.objects
+            .filter(owner=request.user, date__range=(start, end))
+            .values("product_id", "product__name")
+            .annotate(units=Sum("units"), revenue=Sum("revenue"))
+            .filter(units__gt=0)
+            .order_by("-units")[:10]
+        )
+
+        return Response({
+            "from": start,
+            "to": end,
+            "revenue": revenue,
+            "orders": sum(by_status.values()),
+            "orders_by_status": by_status,
+            "daily": [daily[day] for day in sorted(daily)],
+            "top_products": [
+                {
+                    "id": row["product_id"],
+                    "name": row["product__name"],
+                    "units": row["units"],
+                    "revenue": row["revenue"],
+                }
+                for row in top_products
+            ],
+        })
+
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
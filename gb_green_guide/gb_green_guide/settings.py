@@ -32,7 +32,9 @@ CLOUDINARY_STORAGE = {
 
 STORAGES = {
     "default": {
-        "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+        # ✅ same bytes dobara upload nahi hote - core/storage.py (content-hash dedup)
+        "BACKEND": "core.storage.DedupStorage",
+        "OPTIONS": {"backend": "cloudinary_storage.storage.MediaCloudinaryStorage"},
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",